@@ -4,5 +4,6 @@ Shared utilities for Dora nodes.
 """
 
 from .logging import send_log, send_status, get_log_level_from_env
+from .arrow import audio_to_arrow
 
-__all__ = ["send_log", "send_status", "get_log_level_from_env"]
\ No newline at end of file
+__all__ = ["send_log", "send_status", "get_log_level_from_env", "audio_to_arrow"]
\ No newline at end of file
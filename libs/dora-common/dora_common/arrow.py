@@ -0,0 +1,23 @@
+"""
+Common Arrow conversion helpers for Dora nodes.
+"""
+
+import pyarrow as pa
+
+
+def audio_to_arrow(audio_array):
+    """
+    Wrap a 1-D audio array as a one-element Arrow list array.
+
+    The list element type follows the array's dtype (float32 audio gives
+    list<float>). A contiguous array's buffer is reused as the child values;
+    pa.array copies non-contiguous input.
+
+    Args:
+        audio_array: 1-D numpy array of audio samples
+
+    Returns:
+        pa.ListArray holding the samples as its single element
+    """
+    offsets = pa.array([0, len(audio_array)], type=pa.int32())
+    return pa.ListArray.from_arrays(offsets, pa.array(audio_array))
@@ -3,9 +3,13 @@ Common logging utility for Dora nodes.
 Provides consistent logging across all components.
 """
 
+import json
 import pyarrow as pa
 from typing import Any, Dict
 
+# Numeric severities used to filter messages against config_level
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
 
 def send_log(node, level: str, message: str, node_name: str = None, config_level: str = "INFO"):
     """
@@ -18,8 +22,6 @@ def send_log(node, level: str, message: str, node_name: str = None, config_level
         node_name: Name of the node (auto-detected if not provided)
         config_level: Minimum log level to output (default: INFO)
     """
-    LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
-
     if LOG_LEVELS.get(level, 0) < LOG_LEVELS.get(config_level, 20):
         return
 
@@ -37,7 +39,6 @@ def send_log(node, level: str, message: str, node_name: str = None, config_level
 
     try:
         # Send JSON string for debate_viewer compatibility
-        import json
         json_message = json.dumps(log_data)
         node.send_output("log", pa.array([json_message]), metadata=log_data)
     except Exception as e:
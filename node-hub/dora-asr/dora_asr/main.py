@@ -24,6 +24,9 @@ from .utils import (
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'dora-common'))
 from dora_common.logging import send_log as common_send_log, get_log_level_from_env
 
+# Sent in place of a transcription when recognition fails
+EMPTY_TRANSCRIPTION = pa.array([""])
+
 
 def send_log(node, level, message, config_level="INFO"):
     """Wrapper for backward compatibility during migration to common logging."""
@@ -196,7 +199,7 @@ def main():
 
                     node.send_output(
                         "transcription",
-                        pa.array([""]),
+                        EMPTY_TRANSCRIPTION,
                         metadata=error_metadata
                     )
             
@@ -6,6 +6,12 @@ import numpy as np
 import re
 from typing import Optional, Tuple
 
+# Compiled once at import; these run on every transcription
+CHINESE_PATTERN = re.compile(r'[\u4e00-\u9fff]+')
+ENGLISH_PATTERN = re.compile(r'[a-zA-Z]+')
+SPACED_UPPERCASE_PATTERN = re.compile(r'([A-Z])\s+([A-Z](?:\s+[A-Z])*)')
+CHINESE_SPACE_PATTERN = re.compile(r'([\u4e00-\u9fff])\s+([\u4e00-\u9fff])')
+
 
 def ensure_minimum_audio_duration(
     audio_array: np.ndarray, 
@@ -26,9 +32,10 @@ def ensure_minimum_audio_duration(
     min_samples = int(min_duration * sample_rate)
     
     if len(audio_array) < min_samples:
+        # Zero-pad in place of a separate silence buffer + concatenate,
+        # so only the output array is allocated
         padding_needed = min_samples - len(audio_array)
-        padding = np.zeros(padding_needed, dtype=audio_array.dtype)
-        audio_array = np.concatenate([audio_array, padding])
+        audio_array = np.pad(audio_array, (0, padding_needed))
     
     return audio_array
 
@@ -44,12 +51,10 @@ def detect_language_from_text(text: str) -> str:
         'zh' for Chinese, 'en' for English, 'mixed' for both
     """
     # Check for Chinese characters
-    chinese_pattern = re.compile(r'[\u4e00-\u9fff]+')
-    has_chinese = bool(chinese_pattern.search(text))
+    has_chinese = bool(CHINESE_PATTERN.search(text))
     
     # Check for English characters
-    english_pattern = re.compile(r'[a-zA-Z]+')
-    has_english = bool(english_pattern.search(text))
+    has_english = bool(ENGLISH_PATTERN.search(text))
     
     if has_chinese and has_english:
         return 'mixed'
@@ -90,12 +95,10 @@ def fix_spaced_uppercase(text: str) -> str:
     Returns:
         Fixed text
     """
-    pattern = r'([A-Z])\s+([A-Z](?:\s+[A-Z])*)'
-    
     def replace_func(match):
         return match.group(0).replace(' ', '')
     
-    return re.sub(pattern, replace_func, text)
+    return SPACED_UPPERCASE_PATTERN.sub(replace_func, text)
 
 
 def normalize_transcription(text: str, language: str = 'auto') -> str:
@@ -118,7 +121,7 @@ def normalize_transcription(text: str, language: str = 'auto') -> str:
     # Language-specific normalization
     if language == 'zh':
         # Remove spaces between Chinese characters
-        text = re.sub(r'([\u4e00-\u9fff])\s+([\u4e00-\u9fff])', r'\1\2', text)
+        text = CHINESE_SPACE_PATTERN.sub(r'\1\2', text)
     
     return text.strip()
 
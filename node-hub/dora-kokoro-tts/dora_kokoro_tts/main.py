@@ -10,6 +10,7 @@ Environment Variables:
 - SPEED: Legacy speech speed parameter (deprecated, use SPEED_FACTOR)
 - KOKORO_MODEL_CPU: CPU model path (default: "hexgrad/Kokoro-82M")
 - KOKORO_MODEL_MLX: MLX model path (default: "prince-canuma/Kokoro-82M")
+- SYNTHESIS_CACHE_SIZE: Synthesized segments kept for reuse (default: 64, 0 disables)
 - LOG_LEVEL: Logging level (DEBUG, INFO, WARNING, ERROR)
 """
 
@@ -19,6 +20,8 @@ import sys
 import time
 import json
 import traceback
+from collections import OrderedDict
+from types import MappingProxyType
 import numpy as np
 import pyarrow as pa
 from dora import Node
@@ -40,16 +43,23 @@ KOKORO_MODEL_MLX = os.path.expandvars(
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
+# Repeated segments (greetings, fixed prompts) reuse earlier audio instead of re-synthesizing
+SYNTHESIS_CACHE_SIZE = int(os.getenv("SYNTHESIS_CACHE_SIZE", "64"))
+
+# Read-only fallback for text events that carry no metadata
+EMPTY_METADATA = MappingProxyType({})
+
+# Used to switch to the Chinese pipeline when CJK characters are present
+CJK_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+
+# Prebuilt segment_complete payloads (Arrow arrays are immutable, safe to reuse)
+SEGMENT_STATUS = {status: pa.array([status]) for status in ("completed", "skipped", "error")}
+
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
 
 def send_log(node, level, message, config_level="INFO"):
     """Send log message through log output channel."""
-    LOG_LEVELS = {
-        "DEBUG": 10,
-        "INFO": 20,
-        "WARNING": 30,
-        "ERROR": 40
-    }
-
     if LOG_LEVELS.get(level, 0) < LOG_LEVELS.get(config_level, 20):
         return
 
@@ -71,6 +81,19 @@ def send_log(node, level, message, config_level="INFO"):
         node.send_output("log", pa.array([json.dumps(log_data)]))
 
 
+# Same helper as dora_common.arrow.audio_to_arrow. This node is installed on
+# its own (setup_isolated_env.sh) without libs/dora-common, so it keeps a copy.
+def audio_to_arrow(audio_array):
+    """Wrap a 1-D audio array as a one-element Arrow list array.
+
+    The list element type follows the array's dtype (float32 audio gives
+    list<float>). A contiguous array's buffer is reused as the child values;
+    pa.array copies non-contiguous input.
+    """
+    offsets = pa.array([0, len(audio_array)], type=pa.int32())
+    return pa.ListArray.from_arrays(offsets, pa.array(audio_array))
+
+
 def detect_backend():
     """Auto-detect the best available backend."""
     # Try MLX first (if on macOS)
@@ -248,15 +271,39 @@ def create_backend(backend_type):
         raise ValueError(f"Unknown backend type: {backend_type}")
 
 
+def synthesize_cached(backend, cache, text, voice, speed, lang_code):
+    """Synthesize through the backend, reusing audio for repeated requests.
+
+    Returns (audio_array, sample_rate, cache_hit). Cached arrays are marked
+    read-only since the same buffer is handed out on every hit.
+    """
+    key = (text, voice, speed, lang_code)
+    cached = cache.get(key)
+    if cached is not None:
+        cache.move_to_end(key)
+        return cached[0], cached[1], True
+
+    audio_array, sample_rate = backend.synthesize(text, voice, speed, lang_code)
+    if SYNTHESIS_CACHE_SIZE > 0:
+        audio_array.flags.writeable = False
+        cache[key] = (audio_array, sample_rate)
+        if len(cache) > SYNTHESIS_CACHE_SIZE:
+            cache.popitem(last=False)
+    return audio_array, sample_rate, False
+
+
+# Language names to Kokoro language codes
+LANGUAGE_CODES = {
+    "zh": "z", "ch": "z", "chinese": "z", "mandarin": "z",
+    "ja": "j", "japanese": "j",
+    "ko": "k", "korean": "k",
+    "en": "a", "english": "a", "american": "a",
+}
+
+
 def map_language_to_code(language):
     """Map language names to Kokoro language codes."""
-    lang_map = {
-        "zh": "z", "ch": "z", "chinese": "z", "mandarin": "z",
-        "ja": "j", "japanese": "j",
-        "ko": "k", "korean": "k",
-        "en": "a", "english": "a", "american": "a",
-    }
-    return lang_map.get(language.lower(), "a")  # Default to American English
+    return LANGUAGE_CODES.get(language.lower(), "a")  # Default to American English
 
 
 def main():
@@ -288,6 +335,13 @@ def main():
     total_syntheses = 0
     total_duration = 0
     total_processing_time = 0
+    total_cache_hits = 0
+
+    # LANGUAGE is fixed for the node's lifetime; per-text CJK detection overrides it below
+    default_lang_code = map_language_to_code(LANGUAGE)
+
+    # LRU of (text, voice, speed, lang_code) -> (audio_array, sample_rate)
+    synthesis_cache = OrderedDict()
 
     send_log(node, "INFO", "Entering event loop, waiting for events", LOG_LEVEL)
 
@@ -300,12 +354,12 @@ def main():
             if input_id == "text":
                 # Get text to synthesize
                 text = event["value"][0].as_py()
-                metadata = event.get("metadata", {})
+                metadata = event.get("metadata") or EMPTY_METADATA
 
                 # Extract metadata - use safe defaults for optional fields
-                question_id = metadata.get("question_id", "default") if metadata else "default"
-                session_status = metadata.get("session_status", "unknown") if metadata else "unknown"
-                session_id = metadata.get("session_id", "unknown") if metadata else "unknown"
+                question_id = metadata.get("question_id", "default")
+                session_status = metadata.get("session_status", "unknown")
+                session_id = metadata.get("session_id", "unknown")
 
                 send_log(node, "DEBUG", f"Received text: '{text}' (len={len(text)})", LOG_LEVEL)
 
@@ -316,7 +370,7 @@ def main():
                     # Send segment_complete without audio
                     node.send_output(
                         "segment_complete",
-                        pa.array(["skipped"]),
+                        SEGMENT_STATUS["skipped"],
                         metadata={
                             "question_id": question_id,
                             "session_status": session_status,
@@ -337,7 +391,7 @@ def main():
                         send_log(node, "ERROR", f"Failed to initialize backend: {e}", LOG_LEVEL)
                         node.send_output(
                             "segment_complete",
-                            pa.array(["error"]),
+                            SEGMENT_STATUS["error"],
                             metadata={
                                 "question_id": question_id,
                                 "session_status": "error",
@@ -349,9 +403,7 @@ def main():
                         continue
 
                 # Auto-detect language from text if needed
-                lang_code = map_language_to_code(LANGUAGE)
-                if re.findall(r'[\u4e00-\u9fff]+', text):
-                    lang_code = "z"  # Chinese detected
+                lang_code = "z" if CJK_PATTERN.search(text) else default_lang_code  # Chinese detected
 
                 # Log synthesis parameters at DEBUG level
                 send_log(node, "DEBUG",
@@ -363,25 +415,35 @@ def main():
 
                 try:
                     # Generate audio using selected backend
-                    audio_array, sample_rate = backend.synthesize(text, VOICE, SPEED, lang_code)
+                    audio_array, sample_rate, cache_hit = synthesize_cached(
+                        backend, synthesis_cache, text, VOICE, SPEED, lang_code
+                    )
 
                     synthesis_time = time.time() - start_time
                     audio_duration = len(audio_array) / sample_rate
 
-                    total_syntheses += 1
-                    total_duration += audio_duration
-                    total_processing_time += synthesis_time
-
-                    rtf = synthesis_time / audio_duration if audio_duration > 0 else 0
-                    send_log(node, "INFO",
-                            f"Synthesized: {audio_duration:.2f}s audio in {synthesis_time:.3f}s "
-                            f"(RTF: {rtf:.3f}x, backend: {backend.backend_name})",
-                            LOG_LEVEL)
+                    if cache_hit:
+                        # Reused audio took no synthesis, so keep it out of the RTF stats
+                        total_cache_hits += 1
+                        send_log(node, "INFO",
+                                f"Cache hit: reused {audio_duration:.2f}s audio "
+                                f"(backend: {backend.backend_name}, hits: {total_cache_hits})",
+                                LOG_LEVEL)
+                    else:
+                        total_syntheses += 1
+                        total_duration += audio_duration
+                        total_processing_time += synthesis_time
+
+                        rtf = synthesis_time / audio_duration if audio_duration > 0 else 0
+                        send_log(node, "INFO",
+                                f"Synthesized: {audio_duration:.2f}s audio in {synthesis_time:.3f}s "
+                                f"(RTF: {rtf:.3f}x, backend: {backend.backend_name})",
+                                LOG_LEVEL)
 
                     # Send audio output with metadata
                     node.send_output(
                         "audio",
-                        pa.array([audio_array]),
+                        audio_to_arrow(audio_array),
                         metadata={
                             "question_id": question_id,
                             "session_status": session_status,
@@ -396,7 +458,7 @@ def main():
                     # Send segment completion signal
                     node.send_output(
                         "segment_complete",
-                        pa.array(["completed"]),
+                        SEGMENT_STATUS["completed"],
                         metadata={
                             "question_id": question_id,
                             "session_status": session_status,
@@ -413,7 +475,7 @@ def main():
                     # Send segment completion with error status
                     node.send_output(
                         "segment_complete",
-                        pa.array(["error"]),
+                        SEGMENT_STATUS["error"],
                         metadata={
                             "question_id": question_id,
                             "session_status": "error",
@@ -434,6 +496,7 @@ def main():
                     total_syntheses = 0
                     total_duration = 0
                     total_processing_time = 0
+                    total_cache_hits = 0
                     send_log(node, "INFO", "[KokoroTTS] Reset acknowledged", LOG_LEVEL)
 
                 elif command == "stats":
@@ -444,6 +507,7 @@ def main():
                     send_log(node, "INFO", f"Total audio duration: {total_duration:.1f}s", LOG_LEVEL)
                     send_log(node, "INFO", f"Total processing time: {total_processing_time:.1f}s", LOG_LEVEL)
                     send_log(node, "INFO", f"Average RTF: {avg_rtf:.3f}x", LOG_LEVEL)
+                    send_log(node, "INFO", f"Cache hits: {total_cache_hits}", LOG_LEVEL)
                     if total_syntheses > 0:
                         avg_duration = total_duration / total_syntheses
                         send_log(node, "INFO", f"Average audio duration: {avg_duration:.1f}s", LOG_LEVEL)
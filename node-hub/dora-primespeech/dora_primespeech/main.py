@@ -21,6 +21,13 @@ from .moyoyo_tts_wrapper_streaming_fix import StreamingMoYoYoTTSWrapper as MoYoY
 # Add common logging to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'dora-common'))
 from dora_common.logging import send_log as common_send_log, get_log_level_from_env
+from dora_common.arrow import audio_to_arrow
+
+# session_status values that mark the last segment of a session
+SESSION_END_STATUSES = frozenset({"completed", "finished", "ended", "final"})
+
+# Prebuilt segment_complete payloads (Arrow arrays are immutable, safe to reuse)
+SEGMENT_STATUS = {status: pa.array([status]) for status in ("completed", "skipped", "error")}
 
 
 def send_log(node, level, message, config_level="INFO"):
@@ -256,6 +263,17 @@ def main():
     # Statistics
     total_syntheses = 0
     total_duration = 0
+
+    # Synthesis parameters are fixed once the voice config is resolved above
+    language = voice_config.get("text_lang", "zh")
+    speed = voice_config.get("speed_factor", 1.0)
+    fragment_interval = voice_config.get("fragment_interval")
+    batch_synth_kwargs = {
+        "language": language,
+        "speed": speed,
+    }
+    if fragment_interval is not None:
+        batch_synth_kwargs["fragment_interval"] = fragment_interval
     
     for event in node:
         if event["type"] == "INPUT":
@@ -270,31 +288,25 @@ def main():
                 send_log(node, "DEBUG", f"RECEIVED text: '{text}' (len={len(text)}, repr={repr(text)}, type={type(text).__name__})", config.LOG_LEVEL)
 
                 segment_index = int(metadata.get("segment_index", -1))
+                # Pass-through fields, read once for every output of this segment
+                question_id = metadata.get("question_id", "default")
+                session_status = metadata.get("session_status", "unknown")
 
                 # Skip if text is only punctuation or whitespace
                 text_stripped = text.strip()
                 if not text_stripped or all(c in '。！？.!?,，、；：""''（）【】《》\n\r\t ' for c in text_stripped):
                     send_log(node, "DEBUG", f"SKIPPED - text is only punctuation/whitespace: '{text}'", config.LOG_LEVEL)
-                    # Send segment_complete without audio
-                    # Send segment skipped signal
+                    # Send a single segment_complete without audio for flow control,
+                    # passing through ALL metadata with defaults for question_id/session_status
                     node.send_output(
                         "segment_complete",
-                        pa.array(["skipped"]),
+                        SEGMENT_STATUS["skipped"],
                         metadata={
-                            "question_id": metadata.get("question_id", "default"),  # Pass through question_id
-                            "session_status": metadata.get("session_status", "unknown"),  # Pass through session status
+                            "question_id": "default",
+                            "session_status": "unknown",
+                            **metadata,
                         }
                     )
-
-                    # For empty text, just skip processing but send segment_complete for flow control
-                    send_log(node, "DEBUG", f"Skipping empty segment", config.LOG_LEVEL)
-
-                    # Send segment_complete to maintain proper flow control, passing through ALL metadata
-                    node.send_output(
-                        "segment_complete",
-                        pa.array(["empty"]),
-                        metadata=metadata if metadata else {}
-                    )
                     continue
 
                 send_log(node, "DEBUG", f"Processing segment {segment_index + 1} (len={len(text)})", config.LOG_LEVEL)
@@ -341,11 +353,11 @@ def main():
                         # Send error completion signal
                         node.send_output(
                             "segment_complete",
-                            pa.array(["error"]),
+                            SEGMENT_STATUS["error"],
                             metadata={
                                 "session_id": session_id,
                                 "request_id": request_id,
-                                "question_id": metadata.get("question_id", "default"),  # Pass through question_id
+                                "question_id": question_id,  # Pass through question_id
                                 "session_status": "error",  # Explicit error status
                                 "error": str(init_err),
                                 "error_stage": "init"
@@ -354,7 +366,7 @@ def main():
 
                         # Session end signals are now handled by the text segmenter, not TTS
                         # The text segmenter will handle error cases appropriately
-                        send_log(node, "ERROR", f"TTS initialization error for question_id {metadata.get('question_id', 'default')}: {init_err}", config.LOG_LEVEL)
+                        send_log(node, "ERROR", f"TTS initialization error for question_id {question_id}: {init_err}", config.LOG_LEVEL)
                         # Skip this event since we cannot synthesize
                         continue
                 
@@ -371,10 +383,6 @@ def main():
                         send_log(node, "ERROR", "Cannot synthesize - internal TTS is None!", config.LOG_LEVEL)
                         raise RuntimeError("Internal TTS engine not initialized")
                     
-                    language = voice_config.get("text_lang", "zh")
-                    speed = voice_config.get("speed_factor", 1.0)
-                    fragment_interval = voice_config.get("fragment_interval")
-                    
                     if hasattr(tts_engine, 'enable_streaming') and tts_engine.enable_streaming:
                         # Streaming synthesis
                         send_log(node, "DEBUG", "Using streaming synthesis...", config.LOG_LEVEL)
@@ -398,10 +406,10 @@ def main():
                                     audio_fragment = audio_fragment.astype(np.float32)
                                 node.send_output(
                                     "audio",
-                                    pa.array([audio_fragment]),
+                                    audio_to_arrow(audio_fragment),
                                     metadata={
-                                        "question_id": metadata.get("question_id", "default"),  # Pass through question_id
-                                        "session_status": metadata.get("session_status", "unknown"),  # Pass through session status
+                                        "question_id": question_id,  # Pass through question_id
+                                        "session_status": session_status,  # Pass through session status
                                         "sample_rate": sample_rate,
                                         "duration": fragment_duration,
                                     }
@@ -415,14 +423,7 @@ def main():
                         
                     else:
                         # Batch synthesis
-                        synth_kwargs = {
-                            "language": language,
-                            "speed": speed,
-                        }
-                        if fragment_interval is not None:
-                            synth_kwargs["fragment_interval"] = fragment_interval
-
-                        sample_rate, audio_array = tts_engine.synthesize(text, **synth_kwargs)
+                        sample_rate, audio_array = tts_engine.synthesize(text, **batch_synth_kwargs)
                         
                         synthesis_time = time.time() - start_time
                         audio_duration = len(audio_array) / sample_rate
@@ -440,10 +441,10 @@ def main():
                         # Send audio output with segment counting metadata
                         node.send_output(
                             "audio",
-                            pa.array([audio_array]),
+                            audio_to_arrow(audio_array),
                             metadata={
-                                "question_id": metadata.get("question_id", "default"),  # Pass through question_id
-                                "session_status": metadata.get("session_status", "unknown"),  # Pass through session status
+                                "question_id": question_id,  # Pass through question_id
+                                "session_status": session_status,  # Pass through session status
                                 "sample_rate": sample_rate,
                                 "duration": audio_duration,
                             }
@@ -453,19 +454,18 @@ def main():
                     # Send segment completion signal
                     node.send_output(
                         "segment_complete",
-                        pa.array(["completed"]),
+                        SEGMENT_STATUS["completed"],
                         metadata={
-                            "question_id": metadata.get("question_id", "default"),  # Pass through question_id
-                            "session_status": metadata.get("session_status", "unknown"),  # Pass through session status
+                            "question_id": question_id,  # Pass through question_id
+                            "session_status": session_status,  # Pass through session status
                         }
                     )
                     send_log(node, "DEBUG", f"📤 SEGMENT_COMPLETE sent", config.LOG_LEVEL)
 
                     # Session end signals are now handled by the text segmenter, not TTS
                     # The text segmenter detects session end from session_status metadata and sends appropriate signals
-                    session_status = metadata.get("session_status", "unknown")
-                    if session_status in ["completed", "finished", "ended", "final"]:
-                        send_log(node, "INFO", f"TTS completed session for question_id {metadata.get('question_id', 'default')} with status: {session_status}", config.LOG_LEVEL)
+                    if session_status in SESSION_END_STATUSES:
+                        send_log(node, "INFO", f"TTS completed session for question_id {question_id} with status: {session_status}", config.LOG_LEVEL)
 
                 except Exception as e:
                     error_details = traceback.format_exc()
@@ -488,9 +488,9 @@ def main():
                     # Send error completion signal
                     node.send_output(
                         "segment_complete",
-                        pa.array(["error"]),
+                        SEGMENT_STATUS["error"],
                         metadata={
-                            "question_id": metadata.get("question_id", "default"),  # Pass through question_id
+                            "question_id": question_id,  # Pass through question_id
                             "session_status": "error",  # Explicit error status
                             "error": str(e),
                             "error_stage": "synthesis"
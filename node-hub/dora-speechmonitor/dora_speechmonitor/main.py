@@ -13,6 +13,12 @@ from .config import SpeechMonitorConfig
 from .vad import SileroVAD
 from .state_machine import SpeechStateMachine, VoiceTask, SpeechState
 
+# Log level hierarchy
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+# is_speaking is sent for every audio chunk; both possible payloads are built once
+IS_SPEAKING = {True: pa.array([True]), False: pa.array([False])}
+
 
 def calculate_audio_duration(audio_data: np.ndarray, sample_rate: int) -> float:
     """Calculate audio duration in seconds"""
@@ -25,6 +31,45 @@ def normalize_audio_frame(data: bytes) -> np.ndarray:
     return audio_array.astype(np.float32) / 32768.0
 
 
+class AudioChunkBuffer:
+    """Accumulates audio chunks without re-copying the whole buffer per chunk.
+
+    np.append copies everything collected so far on every call, which is
+    quadratic over a long utterance. Chunks are kept in a list and joined
+    once when the audio is actually needed. Each chunk is copied to float64
+    on append, matching what np.append onto an empty np.array([]) produced,
+    so no view of a dora input buffer is held across events.
+
+    If max_samples is set, only the most recent max_samples are retained.
+    """
+
+    def __init__(self, max_samples=None):
+        self.max_samples = max_samples
+        self._chunks = []
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def append(self, chunk: np.ndarray):
+        """Add a chunk, dropping whole chunks that fall outside max_samples."""
+        chunk = np.array(chunk, dtype=np.float64).ravel()
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        if self.max_samples is not None:
+            while self._chunks and self._length - len(self._chunks[0]) >= self.max_samples:
+                self._length -= len(self._chunks.pop(0))
+
+    def to_array(self) -> np.ndarray:
+        """Join the buffered chunks into a single float64 array."""
+        if not self._chunks:
+            return np.array([])
+        audio = np.concatenate(self._chunks)
+        if self.max_samples is not None:
+            audio = audio[-self.max_samples:]
+        return audio
+
+
 def send_log(node, level, message):
     """Send log message through log output channel.
     
@@ -33,20 +78,8 @@ def send_log(node, level, message):
         level: Log level (DEBUG, INFO, WARNING, ERROR)
         message: Log message
     """
-    # Define log level hierarchy
-    LOG_LEVELS = {
-        "DEBUG": 10,
-        "INFO": 20,
-        "WARNING": 30,
-        "ERROR": 40
-    }
-    
-    # Get configured log level
-    from .config import SpeechMonitorConfig
-    config_level = SpeechMonitorConfig.LOG_LEVEL
-    
     # Check if message should be logged
-    if LOG_LEVELS.get(level, 0) < LOG_LEVELS.get(config_level, 20):
+    if LOG_LEVELS.get(level, 0) < LOG_LEVELS.get(SpeechMonitorConfig.LOG_LEVEL, 20):
         return  # Skip messages below configured level
     
     # Format message with level prefix
@@ -75,11 +108,11 @@ def main():
         vad_instance = SileroVAD(threshold=config.VAD_THRESHOLD)
     
     # Audio buffer
-    audio_frames = np.array([])
+    audio_frames = AudioChunkBuffer()
     
-    # Pre-speech buffer for capturing speech onset
-    pre_speech_buffer = np.array([])
+    # Pre-speech buffer for capturing speech onset, keeps only the last 200ms
     pre_speech_buffer_size = int(0.2 * config.SAMPLE_RATE)  # 200ms
+    pre_speech_buffer = AudioChunkBuffer(max_samples=pre_speech_buffer_size)
     
     send_log(node, "INFO", "Speech Monitor initialized")
     send_log(node, "INFO", f"VAD: {'Enabled' if config.VAD_ENABLED else 'Disabled'}")
@@ -96,6 +129,9 @@ def main():
     
     # Pause/Resume control
     is_paused = False
+
+    # Resolved once; gates DEBUG-only work on the per-chunk audio path
+    debug_enabled = LOG_LEVELS.get(config.LOG_LEVEL, 20) <= LOG_LEVELS["DEBUG"]
     
     for event in node:
         # Handle control signals for pause/resume
@@ -108,8 +144,8 @@ def main():
                     send_log(node, "INFO", "Speech Monitor PAUSED")
                     # Reset state when pausing
                     state_machine.reset()
-                    audio_frames = np.array([])
-                    pre_speech_buffer = np.array([])
+                    audio_frames = AudioChunkBuffer()
+                    pre_speech_buffer = AudioChunkBuffer(max_samples=pre_speech_buffer_size)
                     last_speech_end_time = None  # Reset timing
                     question_end_sent = False
             
@@ -119,8 +155,8 @@ def main():
                     send_log(node, "INFO", "Speech Monitor RESUMED")
                     # Reset state for fresh start
                     state_machine.reset()
-                    audio_frames = np.array([])
-                    pre_speech_buffer = np.array([])
+                    audio_frames = AudioChunkBuffer()
+                    pre_speech_buffer = AudioChunkBuffer(max_samples=pre_speech_buffer_size)
                     speech_segment_count = 0
                     last_speech_end_time = None  # Reset timing
                     question_end_sent = False
@@ -141,7 +177,8 @@ def main():
                 state_machine._audio_receive_count = 0
             state_machine._audio_receive_count += 1
             
-            if state_machine._audio_receive_count % 10 == 0:
+            # Skip the amplitude scan entirely unless DEBUG output is enabled
+            if debug_enabled and state_machine._audio_receive_count % 10 == 0:
                 max_amp = np.abs(audio_chunk).max() if len(audio_chunk) > 0 else 0
                 send_log(node, "DEBUG", f"Received audio chunk #{state_machine._audio_receive_count}: {len(audio_chunk)} samples, max amp: {max_amp:.4f}")
             
@@ -174,7 +211,7 @@ def main():
             # Send is_speaking status
             node.send_output(
                 "is_speaking",
-                pa.array([state_machine.state == SpeechState.SPEAKING])
+                IS_SPEAKING[state_machine.state == SpeechState.SPEAKING]
             )
             
             # State machine processing
@@ -193,10 +230,9 @@ def main():
                     speech_segment_count += 1
                     
                     # Include pre-speech buffer
+                    audio_frames = AudioChunkBuffer()
                     if len(pre_speech_buffer) > 0:
-                        audio_frames = pre_speech_buffer.copy()
-                    else:
-                        audio_frames = np.array([])
+                        audio_frames.append(pre_speech_buffer.to_array())
                     
                     # Send speech_started event
                     node.send_output(
@@ -215,7 +251,7 @@ def main():
                 state_machine.user_silence_duration = 0
                 
                 # Append to buffer
-                audio_frames = np.append(audio_frames, audio_chunk)
+                audio_frames.append(audio_chunk)
                 state_machine.is_audio_frames_empty = False
                 
                 # Check for interrupt condition (from VoiceDialogue)
@@ -233,11 +269,11 @@ def main():
                     send_log(node, "DEBUG", "Trailing silence...")
                     
                     # Still append audio (might resume)
-                    audio_frames = np.append(audio_frames, audio_chunk)
+                    audio_frames.append(audio_chunk)
                     
                 elif state_machine.state == SpeechState.TRAILING_SILENCE:
                     # Continue trailing silence
-                    audio_frames = np.append(audio_frames, audio_chunk)
+                    audio_frames.append(audio_chunk)
                     
                     # Check if silence is long enough to end speech
                     if state_machine.is_user_in_silence(config.SILENCE_THRESHOLD):
@@ -254,21 +290,23 @@ def main():
                         
                         # Send complete audio segment
                         if len(audio_frames) > 0:
+                            segment_audio = audio_frames.to_array()
+
                             # Check if over threshold
-                            audio_duration_ms = calculate_audio_duration(audio_frames, sr) * 1000
+                            audio_duration_ms = calculate_audio_duration(segment_audio, sr) * 1000
                             is_over_threshold = audio_duration_ms >= config.AUDIO_FRAMES_THRESHOLD
                             
                             # Create voice task
                             voice_task = VoiceTask.create(
                                 question_id=state_machine.question_id,
-                                audio_data=audio_frames
+                                audio_data=segment_audio
                             )
                             voice_task.is_over_audio_frames_threshold = is_over_threshold
 
                             # Send audio segment with question_id metadata
                             node.send_output(
                                 "audio_segment",
-                                pa.array(audio_frames),
+                                pa.array(segment_audio),
                                 metadata={
                                     "question_id": state_machine.question_id,
                                     "sample_rate": sr
@@ -280,7 +318,7 @@ def main():
                         
                         # Transition to silence
                         state_machine.transition_to_silence()
-                        audio_frames = np.array([])
+                        audio_frames = AudioChunkBuffer()
                         
                     # Check for user silence (longer threshold)
                     if state_machine.is_user_in_silence(config.USER_SILENCE_THRESHOLD):
@@ -290,11 +328,7 @@ def main():
                         
                 elif state_machine.state == SpeechState.SILENCE:
                     # Maintain pre-speech buffer
-                    pre_speech_buffer = np.append(pre_speech_buffer, audio_chunk)
-                    
-                    # Keep only last 200ms
-                    if len(pre_speech_buffer) > pre_speech_buffer_size:
-                        pre_speech_buffer = pre_speech_buffer[-pre_speech_buffer_size:]
+                    pre_speech_buffer.append(audio_chunk)
                     
                     # Check for question_ended signal (longer silence after speech)
                     if last_speech_end_time and not question_end_sent:
@@ -310,7 +344,8 @@ def main():
             
             # Check for max segment duration
             if len(audio_frames) > 0:
-                current_duration_ms = calculate_audio_duration(audio_frames, sr) * 1000
+                # Duration only depends on the sample count, no need to join chunks here
+                current_duration_ms = len(audio_frames) / sr * 1000
                 if current_duration_ms >= config.AUDIO_FRAMES_THRESHOLD:
                     # Force segment end due to length
                     send_log(node, "WARNING", "Max segment duration reached, forcing segment end")
@@ -318,7 +353,7 @@ def main():
                     # Send audio segment with question_id metadata
                     node.send_output(
                         "audio_segment",
-                        pa.array(audio_frames),
+                        pa.array(audio_frames.to_array()),
                         metadata={
                             "question_id": state_machine.question_id,
                             "sample_rate": sr
@@ -326,7 +361,7 @@ def main():
                     )
 
                     # Reset buffers
-                    audio_frames = np.array([])
+                    audio_frames = AudioChunkBuffer()
                     state_machine.reset()
 
 
@@ -9,15 +9,27 @@ import os
 import re
 import time
 import json
-from typing import List, Dict, Any
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional
 import pyarrow as pa
 from dora import Node
 
+# Seconds to wait for tts_complete before forcing the next segment
+COMPLETION_TIMEOUT = 30.0
+# Prebuilt status payload sent when a session has no segments left
+ALL_SEGMENTS_SENT = pa.array(["all_segments_sent"])
+# Read-only fallback when an event carries no metadata
+EMPTY_METADATA = MappingProxyType({})
+
+# Punctuation split patterns (capturing, so the marks are kept)
+SENTENCE_SPLIT_PATTERN = re.compile(r'([。！？.!?])')
+CLAUSE_SPLIT_PATTERN = re.compile(r'([；;])')
+
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
 
 def send_log(node, level, message, config_level="INFO"):
     """Send log message through log output channel."""
-    LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
-
     if LOG_LEVELS.get(level, 0) < LOG_LEVELS.get(config_level, 20):
         return
 
@@ -41,18 +53,24 @@ class SequentialTextSegmenter:
         
         # State for each session
         self.sessions: Dict[str, Dict[str, Any]] = {}
+
+    def next_deadline(self) -> Optional[float]:
+        """Return the earliest completion deadline (monotonic), if any."""
+        return min(
+            (
+                session["last_sent_time"] + COMPLETION_TIMEOUT
+                for session in self.sessions.values()
+                if session.get("awaiting_completion", False)
+            ),
+            default=None,
+        )
         
     def segment_by_punctuation(self, text: str) -> List[str]:
         """Segment text by punctuation marks."""
-        # Define punctuation patterns
-        sentence_marks = r'[。！？.!?]'
-        clause_marks = r'[；;]'
-        phrase_marks = r'[，,、]'
-        
         segments = []
         
         # Split by sentence-ending punctuation
-        parts = re.split(f'({sentence_marks})', text)
+        parts = SENTENCE_SPLIT_PATTERN.split(text)
         
         current_segment = ""
         for i in range(0, len(parts), 2):
@@ -68,7 +86,7 @@ class SequentialTextSegmenter:
             # Check length and split if needed
             if len(segment) > self.max_length:
                 # Further split by clause marks
-                clause_parts = re.split(f'({clause_marks})', segment)
+                clause_parts = CLAUSE_SPLIT_PATTERN.split(segment)
                 for j in range(0, len(clause_parts), 2):
                     if j + 1 < len(clause_parts):
                         clause = clause_parts[j] + clause_parts[j + 1]
@@ -125,7 +143,7 @@ class SequentialTextSegmenter:
             # Mark as sent
             session["current_index"] += 1
             session["awaiting_completion"] = True
-            session["last_sent_time"] = time.time()
+            session["last_sent_time"] = time.monotonic()
         else:
             # All segments sent
             send_log(node, "INFO", f"Session {session_id} complete - all segments sent", log_level)
@@ -133,7 +151,7 @@ class SequentialTextSegmenter:
             # Send completion status
             node.send_output(
                 "status",
-                pa.array(["all_segments_sent"]),
+                ALL_SEGMENTS_SENT,
                 metadata={
                     "session_id": session_id,
                     "total_segments": len(session["segments"])
@@ -154,13 +172,25 @@ def main():
     send_log(node, "INFO", f"Configured — max_segment_length: {segmenter.max_length}", log_level)
 
     while True:
-        event = node.next(timeout=0.5)
-
-        # Check for timeouts
-        current_time = time.time()
-        for session_id, session in list(segmenter.sessions.items()):
-            if session.get("awaiting_completion", False):
-                if current_time - session.get("last_sent_time", 0) > 30:
+        # Sleep until the next event or the earliest completion deadline
+        # rather than waking on a fixed interval to rescan every session
+        deadline = segmenter.next_deadline()
+        if deadline is None:
+            # Nothing is awaiting completion, so block until the next event;
+            # None here means every input has closed
+            event = node.next()
+            if event is None:
+                break
+        else:
+            event = node.next(timeout=max(0.0, deadline - time.monotonic()))
+
+        # Check for timeouts only once a deadline has actually passed
+        current_time = time.monotonic()
+        if deadline is not None and current_time >= deadline:
+            for session_id, session in list(segmenter.sessions.items()):
+                if not session.get("awaiting_completion", False):
+                    continue
+                if current_time - session["last_sent_time"] >= COMPLETION_TIMEOUT:
                     send_log(node, "WARNING", f"Timeout for session {session_id}, forcing next segment", log_level)
                     session["awaiting_completion"] = False
                     segmenter.send_next_segment(node, session_id, log_level)
@@ -172,7 +202,7 @@ def main():
             if event["id"] == "text":
                 # New text to segment
                 text = event["value"][0].as_py()
-                metadata = event.get("metadata", {})
+                metadata = event.get("metadata") or EMPTY_METADATA
                 session_id = metadata.get("session_id", f"session_{time.time()}")
                 request_id = metadata.get("request_id", f"req_{time.time()}")
 
@@ -197,7 +227,7 @@ def main():
 
             elif event["id"] == "tts_complete":
                 # TTS completed a segment, send next one
-                metadata = event.get("metadata", {})
+                metadata = event.get("metadata") or EMPTY_METADATA
                 session_id = metadata.get("session_id")
                 segment_index = metadata.get("segment_index", -1)
 
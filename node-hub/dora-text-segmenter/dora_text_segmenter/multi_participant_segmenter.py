@@ -15,17 +15,90 @@ import time
 import re
 import json
 import uuid
+from functools import lru_cache
 from typing import Optional, List, Dict
 from dataclasses import dataclass, field
+from types import MappingProxyType
 import pyarrow as pa
 from dora import Node
 from collections import deque
 
+# [Speaker Name] prefix at the start of a chunk
+SPEAKER_ID_PATTERN = re.compile(r'^\[([^\]]+)\]\s*')
+
+# Input ports that never carry participant text
+CONTROL_PORTS = frozenset({"control", "reset"})
+BUFFER_CONTROL_PORTS = frozenset({"audio_buffer_control"})
+COMPLETION_PORTS = frozenset({"audio_complete"})  # Audio player completion signals
+NON_PARTICIPANT_PORTS = CONTROL_PORTS | BUFFER_CONTROL_PORTS | COMPLETION_PORTS
+
+# Control commands that clear queued segments
+RESET_COMMANDS = frozenset({"reset", "cancel"})
+
+# Read-only fallback for input events without metadata
+EMPTY_METADATA = MappingProxyType({})
+
+
+@lru_cache(maxsize=8)
+def punctuation_patterns(punctuation_marks):
+    """Compiled (segment, open text, mark) patterns for the configured punctuation marks.
+
+    segment matches a run of non-punctuation text closed by one mark;
+    open text matches a single non-punctuation character;
+    mark matches a single punctuation mark.
+    """
+    if not punctuation_marks:
+        return re.compile(r'(?!)'), re.compile(r'[\s\S]'), re.compile(r'(?!)')
+    marks = re.escape(punctuation_marks)
+    return re.compile(f'[^{marks}]+[{marks}]'), re.compile(f'[^{marks}]'), re.compile(f'[{marks}]')
+
+
+@lru_cache(maxsize=None)
+def segment_output_port(participant):
+    """Output port for a participant's segments, formatted once per participant."""
+    return f"text_segment_{participant}"
+
+
+def as_py(value):
+    """Unwrap an Arrow scalar to its Python value; plain values pass through."""
+    to_py = getattr(value, "as_py", None)
+    return to_py() if to_py is not None else value
+
+
+class TextBuffer:
+    """Incomplete text carried between a participant's chunks, kept as a list of parts.
+
+    Appending to a str copies everything buffered so far, which is quadratic
+    when text streams in a few characters at a time. Parts are joined only
+    when the buffer is read, and the buffer always holds the same text that
+    `(buffer + chunk).strip()` would.
+    """
+
+    def __init__(self, text=""):
+        self._parts = [text] if text else []
+        self._length = len(text)
+
+    def __len__(self):
+        return self._length
+
+    def __str__(self):
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def extend(self, chunk):
+        """Append a chunk, stripping it the way the joined text would be stripped."""
+        piece = chunk.rstrip() if self._parts else chunk.strip()
+        if piece:
+            self._parts.append(piece)
+            self._length += len(piece)
+
+
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
 
 def send_log(node, level, message, config_level="INFO"):
     """Send log message through log output channel."""
-    LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
-
     if LOG_LEVELS.get(level, 0) < LOG_LEVELS.get(config_level, 20):
         return
 
@@ -58,11 +131,10 @@ def detect_session_event(metadata):
 
 def remove_speaker_id(text, node, log_level):
     """Remove [Speaker Name] prefix from text."""
-    pattern = r'^\[([^\]]+)\]\s*'
-    match = re.match(pattern, text)
+    match = SPEAKER_ID_PATTERN.match(text)
     if match:
         speaker = match.group(1)
-        cleaned = re.sub(pattern, '', text)
+        cleaned = text[match.end():]
         send_log(node, "DEBUG", f"Removed speaker ID [{speaker}], cleaned: '{cleaned}'", log_level)
         return cleaned
     return text
@@ -78,7 +150,7 @@ def should_skip_segment(text, punctuation_marks, node, log_level):
     return False
 
 
-def segment_by_punctuation(text, min_length, max_length, punctuation_marks, node, log_level):
+def segment_by_punctuation(text, min_length, max_length, punctuation_marks, node, log_level, scan_from=0):
     """
     Segment text by punctuation marks, respecting MAX_SEGMENT_LENGTH when possible.
 
@@ -87,20 +159,30 @@ def segment_by_punctuation(text, min_length, max_length, punctuation_marks, node
     - If a segment is <= MAX_SEGMENT_LENGTH, keep it as-is
     - If a segment is > MAX_SEGMENT_LENGTH, split it at intermediate punctuation marks
     - Never split mid-sentence (always split at punctuation boundaries)
+    - scan_from: length of the buffered incomplete text at the start of `text`;
+      only the newly appended part is scanned for punctuation
 
     Returns: (complete_segments, incomplete_text, keep_incomplete)
     """
     if not text:
         return [], "", False
 
-    escaped_punctuation = re.escape(punctuation_marks)
-    pattern = f'[^{escaped_punctuation}]+[{escaped_punctuation}]'
+    segment_pattern, open_text_pattern, _ = punctuation_patterns(punctuation_marks)
 
     segments = []
     last_end = 0
     accumulator = ""
 
-    for match in re.finditer(pattern, text):
+    # text[:scan_from] is the buffered tail of the previous call and holds no
+    # closed segment, only optional stray punctuation followed by open text,
+    # so resume matching where that open text starts instead of re-scanning it
+    open_text = open_text_pattern.search(text, 0, scan_from)
+    scan_start = open_text.start() if open_text else scan_from
+
+    # A segment is a run of non-punctuation text closed by one punctuation
+    # mark; punctuation with no text before it is skipped. finditer walks the
+    # matches in C rather than testing every character in Python
+    for match in segment_pattern.finditer(text, scan_start):
         segment_text = match.group().strip()
         if not segment_text:
             continue
@@ -155,10 +237,7 @@ def segment_by_punctuation(text, min_length, max_length, punctuation_marks, node
 
 def is_participant_port(event_id):
     """Check if event_id is a participant input port (not control or TTS or buffer control)."""
-    CONTROL_PORTS = {"control", "reset"}
-    BUFFER_CONTROL_PORTS = {"audio_buffer_control"}
-    COMPLETION_PORTS = {"audio_complete"}  # Audio player completion signals
-    if event_id in CONTROL_PORTS or event_id in BUFFER_CONTROL_PORTS or event_id in COMPLETION_PORTS:
+    if event_id in NON_PARTICIPANT_PORTS:
         return False
     if event_id.startswith("tts_complete_"):  # Keep for backward compatibility
         return False
@@ -170,19 +249,13 @@ def select_oldest_session_queue(participant_names, session_timestamps, segment_q
     Find participant queue with oldest session timestamp.
     Only considers queues that have both session timestamp AND segments.
     """
-    candidates = []
-
-    for participant in participant_names:
-        if session_timestamps[participant] and segment_queues[participant]:
-            oldest_ts = session_timestamps[participant][0]["timestamp"]
-            candidates.append((participant, oldest_ts))
-
-    if not candidates:
-        return None
-
-    # Sort by timestamp, return oldest
-    candidates.sort(key=lambda x: x[1])
-    return candidates[0][0]
+    # Single pass for the minimum; ties keep participant order like a stable sort
+    return min(
+        (participant for participant in participant_names
+         if session_timestamps[participant] and segment_queues[participant]),
+        key=lambda participant: session_timestamps[participant][0]["timestamp"],
+        default=None,
+    )
 
 
 def handle_audio_buffer_control(buffer_percentage, node, log_level, active_queue_ref, segment_queues, is_sending, buffer_control_paused_ref, audio_buffer_level_ref, low_water_mark, high_water_mark, last_session_end_sent):
@@ -216,7 +289,7 @@ def send_next_segment_for_participant(participant, node, log_level, segment_queu
         return
 
     segment = segment_queues[participant].popleft()
-    output_port = f"text_segment_{participant}"
+    output_port = segment_output_port(participant)
 
     send_log(node, "INFO",
             f"🎤 RESUMED SENDING to {participant}: '{segment['text']}' "
@@ -262,15 +335,15 @@ def complete_session_and_activate_next(completed_participant, node, participant_
     active_queue_ref[0] = None
 
     # Debug: Log state of all participants before selecting next queue
-    send_log(node, "INFO", f"🔍 Selecting next queue. State:", log_level)
+    # (collected into a single log output rather than one send per participant)
+    state_lines = []
     for p in participant_names:
-        has_session = len(session_timestamps[p]) > 0
-        has_segments = len(segment_queues[p]) > 0
-        if has_session:
+        if session_timestamps[p]:
             oldest_ts = session_timestamps[p][0]["timestamp"]
-            send_log(node, "INFO", f"  {p}: sessions={len(session_timestamps[p])}, segments={len(segment_queues[p])}, oldest_ts={oldest_ts:.3f}", log_level)
+            state_lines.append(f"  {p}: sessions={len(session_timestamps[p])}, segments={len(segment_queues[p])}, oldest_ts={oldest_ts:.3f}")
         else:
-            send_log(node, "INFO", f"  {p}: sessions=0, segments={len(segment_queues[p])}", log_level)
+            state_lines.append(f"  {p}: sessions=0, segments={len(segment_queues[p])}")
+    send_log(node, "INFO", "🔍 Selecting next queue. State:\n" + "\n".join(state_lines), log_level)
 
     # Find next oldest session (might be same participant's next session, or different participant)
     next_queue = select_oldest_session_queue(participant_names, session_timestamps, segment_queues)
@@ -307,12 +380,15 @@ def main():
         log_level,
     )
 
+    # Used to tell chunks that can close a segment from ones that only extend the buffer
+    _, _, punctuation_mark_pattern = punctuation_patterns(punctuation_marks)
+
     # Dynamically discovered participants
     participant_names = []
 
     # Per-participant data structures (initialized on-demand)
     segment_queues = {}        # participant -> deque([{text, session_id, is_session_end}, ...])
-    text_buffers = {}          # participant -> str (incomplete text)
+    text_buffers = {}          # participant -> TextBuffer (incomplete text)
     session_timestamps = {}    # participant -> deque([{session_id, timestamp}, ...])
     current_session = {}       # participant -> session_id (currently receiving)
     is_sending = {}            # participant -> bool (TTS busy flag, for kick-start only)
@@ -328,7 +404,7 @@ def main():
         if participant not in participant_names:
             participant_names.append(participant)
             segment_queues[participant] = deque()
-            text_buffers[participant] = ""
+            text_buffers[participant] = TextBuffer()
             session_timestamps[participant] = deque()
             current_session[participant] = None
             is_sending[participant] = False
@@ -349,7 +425,7 @@ def main():
 
         # Immediately trigger first send by simulating TTS_COMPLETE logic
         segment = segment_queues[participant].popleft()
-        output_port = f"text_segment_{participant}"
+        output_port = segment_output_port(participant)
 
         send_log(node, "INFO",
             f"🎤 SENDING to {participant}: '{segment['text']}' "
@@ -381,361 +457,404 @@ def main():
             send_log(node, "INFO", f"🎯 ACTIVATED QUEUE: {active_queue}", log_level)
             kick_start_sending(next_queue)
 
-    send_log(node, "INFO", "Multi-Participant Text Segmenter started (session-based FIFO)", log_level)
+    # ==================== RECEIVING SIDE: Participant Input Events ====================
+    def on_participant_input(event):
+        """Text chunk streamed from a participant (any port not claimed below)."""
+        participant = event["id"]
+        ensure_participant_initialized(participant)
+
+        text = event["value"][0].as_py() if event.get("value") else ""
+        metadata = event.get("metadata") or EMPTY_METADATA
+        session_event = detect_session_event(metadata)
+
+        if session_event == "SESSION_START":
+            # New session starting
+            session_id = str(uuid.uuid4())
+            timestamp = time.time()
+
+            # Capture question_id and session_status from incoming metadata
+            question_id = metadata.get("question_id")
+            session_status = metadata.get("session_status", "started")
+
+            session_timestamps[participant].append({
+                "session_id": session_id,
+                "timestamp": timestamp,
+                "question_id": question_id,
+                "session_status": session_status
+            })
+            current_session[participant] = session_id
 
-    for event in node:
-        event_id = event["id"]
-
-        # ==================== RECEIVING SIDE: Participant Input Events ====================
-        if is_participant_port(event_id):
-            participant = event_id
-            ensure_participant_initialized(participant)
-
-            text = event["value"][0].as_py() if event.get("value") else ""
-            metadata = event.get("metadata", {})
-            session_event = detect_session_event(metadata)
-
-            if session_event == "SESSION_START":
-                # New session starting
-                session_id = str(uuid.uuid4())
-                timestamp = time.time()
-
-                # Capture question_id and session_status from incoming metadata
-                question_id = metadata.get("question_id")
-                session_status = metadata.get("session_status", "started")
-
-                session_timestamps[participant].append({
-                    "session_id": session_id,
-                    "timestamp": timestamp,
-                    "question_id": question_id,
-                    "session_status": session_status
-                })
-                current_session[participant] = session_id
-
-                send_log(node, "INFO",
-                    f"📥 SESSION_START: {participant}, session_id={session_id}, ts={timestamp:.3f}",
-                    log_level)
+            send_log(node, "INFO",
+                f"📥 SESSION_START: {participant}, session_id={session_id}, ts={timestamp:.3f}",
+                log_level)
 
-                # FIX: Process the text content that comes with SESSION_START
-                # The first chunk with session_status="started" contains actual text that must be processed
-                if remove_speaker_id_enabled:
-                    text = remove_speaker_id(text, node, log_level)
+            # FIX: Process the text content that comes with SESSION_START
+            # The first chunk with session_status="started" contains actual text that must be processed
+            if remove_speaker_id_enabled:
+                text = remove_speaker_id(text, node, log_level)
 
-                send_log(node, "INFO",
-                    f"📥 FIRST CHUNK from {participant}: '{text}' (len={len(text)})",
-                    log_level)
+            send_log(node, "INFO",
+                f"📥 FIRST CHUNK from {participant}: '{text}' (len={len(text)})",
+                log_level)
 
+            if punctuation_mark_pattern.search(text):
                 # Process this first chunk through the same pipeline as SESSION_CHUNK
-                combined_text = text_buffers[participant] + text
+                buffered_text = str(text_buffers[participant])
+                combined_text = buffered_text + text
 
-                # Segment by punctuation
+                # Segment by punctuation (only the new chunk needs scanning)
                 complete_segments, incomplete_text, keep_incomplete = segment_by_punctuation(
                     combined_text,
                     min_segment_length,
                     max_segment_length,
                     punctuation_marks,
                     node,
-                    log_level
+                    log_level,
+                    scan_from=len(buffered_text),
                 )
 
                 # Update text buffer
-                text_buffers[participant] = incomplete_text if keep_incomplete else ""
-
-                # Enqueue segments from the first chunk
-                # Get metadata from the current session
+                text_buffers[participant] = TextBuffer(incomplete_text) if keep_incomplete else TextBuffer()
+            else:
+                # No mark in this chunk, so nothing can close: append it to
+                # the buffer without re-joining and re-scanning the buffered text
+                text_buffers[participant].extend(text)
+                complete_segments = []
+
+            # Enqueue segments from the first chunk
+            # Session fields are the same for every segment of the chunk,
+            # so read them from the current session once
+            if complete_segments:
                 current_session_metadata = session_timestamps[participant][-1] if session_timestamps[participant] else {}
+                segment_session_id = current_session[participant]
+                segment_question_id = current_session_metadata.get("question_id")
+                segment_session_status = current_session_metadata.get("session_status", "started")
+
+            for segment_text in complete_segments:
+                if not should_skip_segment(segment_text, punctuation_marks, node, log_level):
+                    segment_queues[participant].append({
+                        "text": segment_text,
+                        "session_id": segment_session_id,
+                        "is_session_end": False,
+                        "question_id": segment_question_id,
+                        "session_status": segment_session_status
+                    })
+                    send_log(node, "INFO",
+                        f"📝 ENQUEUED FIRST segment for {participant}: '{segment_text}' (queue_size: {len(segment_queues[participant])})",
+                        log_level)
 
-                for i, segment_text in enumerate(complete_segments):
-                    if not should_skip_segment(segment_text, punctuation_marks, node, log_level):
-                        segment_queues[participant].append({
-                            "text": segment_text,
-                            "session_id": current_session[participant],
-                            "is_session_end": False,
-                            "question_id": current_session_metadata.get("question_id"),
-                            "session_status": current_session_metadata.get("session_status", "started")
-                        })
-                        send_log(node, "INFO",
-                            f"📝 ENQUEUED FIRST segment for {participant}: '{segment_text}' (queue_size: {len(segment_queues[participant])})",
-                            log_level)
-
-                # Try to activate queue if idle
-                try_activate_queue()
+            # Try to activate queue if idle
+            try_activate_queue()
 
-            elif session_event == "SESSION_CHUNK":
-                # Process text chunk
-                if current_session[participant] is None:
-                    send_log(node, "WARNING",
-                        f"Received chunk for {participant} but no current session", log_level)
-                    continue
+        elif session_event == "SESSION_CHUNK":
+            # Process text chunk
+            if current_session[participant] is None:
+                send_log(node, "WARNING",
+                    f"Received chunk for {participant} but no current session", log_level)
+                return
 
-                # Apply speaker ID removal
-                if remove_speaker_id_enabled:
-                    text = remove_speaker_id(text, node, log_level)
+            # Apply speaker ID removal
+            if remove_speaker_id_enabled:
+                text = remove_speaker_id(text, node, log_level)
 
-                send_log(node, "DEBUG",
-                    f"📥 CHUNK from {participant}: '{text}' (len={len(text)})",
-                    log_level)
+            send_log(node, "DEBUG",
+                f"📥 CHUNK from {participant}: '{text}' (len={len(text)})",
+                log_level)
 
+            if punctuation_mark_pattern.search(text):
                 # Combine with text buffer
-                combined_text = text_buffers[participant] + text
+                buffered_text = str(text_buffers[participant])
+                combined_text = buffered_text + text
 
-                # Segment by punctuation
+                # Segment by punctuation (only the new chunk needs scanning)
                 complete_segments, incomplete_text, keep_incomplete = segment_by_punctuation(
                     combined_text,
                     min_segment_length,
                     max_segment_length,
                     punctuation_marks,
                     node,
-                    log_level
+                    log_level,
+                    scan_from=len(buffered_text),
                 )
 
                 # Update text buffer
-                text_buffers[participant] = incomplete_text if keep_incomplete else ""
-
-                # Enqueue segments
-                # Get metadata from the current session
+                text_buffers[participant] = TextBuffer(incomplete_text) if keep_incomplete else TextBuffer()
+            else:
+                # No mark in this chunk, so nothing can close: append it to
+                # the buffer without re-joining and re-scanning the buffered text
+                text_buffers[participant].extend(text)
+                complete_segments = []
+
+            # Enqueue segments
+            # Most streamed chunks close no segment; only look up the
+            # session fields when there is something to enqueue
+            if complete_segments:
                 current_session_metadata = session_timestamps[participant][-1] if session_timestamps[participant] else {}
+                segment_session_id = current_session[participant]
+                segment_question_id = current_session_metadata.get("question_id")
+                segment_session_status = current_session_metadata.get("session_status", "started")
+
+            for segment_text in complete_segments:
+                if not should_skip_segment(segment_text, punctuation_marks, node, log_level):
+                    segment_queues[participant].append({
+                        "text": segment_text,
+                        "session_id": segment_session_id,
+                        "is_session_end": False,
+                        "question_id": segment_question_id,
+                        "session_status": segment_session_status
+                    })
+
+            # Try to activate queue if idle
+            try_activate_queue()
+
+        elif session_event == "SESSION_END":
+            # Session ended - flush buffer
+            if current_session[participant] is None:
+                send_log(node, "WARNING",
+                    f"Received SESSION_END for {participant} but no current session", log_level)
+                return
 
-                for i, segment_text in enumerate(complete_segments):
-                    if not should_skip_segment(segment_text, punctuation_marks, node, log_level):
-                        segment_queues[participant].append({
-                            "text": segment_text,
-                            "session_id": current_session[participant],
-                            "is_session_end": False,
-                            "question_id": current_session_metadata.get("question_id"),
-                            "session_status": current_session_metadata.get("session_status", "started")
-                        })
-
-                # Try to activate queue if idle
-                try_activate_queue()
-
-            elif session_event == "SESSION_END":
-                # Session ended - flush buffer
-                if current_session[participant] is None:
-                    send_log(node, "WARNING",
-                        f"Received SESSION_END for {participant} but no current session", log_level)
-                    continue
+            send_log(node, "INFO",
+                f"🏁 SESSION_END: {participant}, session_id={current_session[participant]}",
+                log_level)
 
-                send_log(node, "INFO",
-                    f"🏁 SESSION_END: {participant}, session_id={current_session[participant]}",
-                    log_level)
+            # Flush incomplete buffer as final segment
+            # Get metadata from the current session
+            current_session_metadata = session_timestamps[participant][-1] if session_timestamps[participant] else {}
+
+            if text_buffers[participant]:
+                incomplete_text = str(text_buffers[participant])
+                if not should_skip_segment(incomplete_text, punctuation_marks, node, log_level):
+                    segment_queues[participant].append({
+                        "text": incomplete_text,
+                        "session_id": current_session[participant],
+                        "is_session_end": True,  # Mark as session end
+                        "question_id": current_session_metadata.get("question_id"),
+                        "session_status": current_session_metadata.get("session_status", "ended")
+                    })
+                    send_log(node, "DEBUG",
+                        f"🔥 Flushed buffer as final segment: '{incomplete_text}'", log_level)
+                text_buffers[participant] = TextBuffer()
+            else:
+                # No buffer to flush, mark last segment as session end
+                if segment_queues[participant]:
+                    segment_queues[participant][-1]["is_session_end"] = True
 
-                # Flush incomplete buffer as final segment
-                # Get metadata from the current session
-                current_session_metadata = session_timestamps[participant][-1] if session_timestamps[participant] else {}
+            current_session[participant] = None
 
-                if text_buffers[participant].strip():
-                    incomplete_text = text_buffers[participant].strip()
-                    if not should_skip_segment(incomplete_text, punctuation_marks, node, log_level):
-                        segment_queues[participant].append({
-                            "text": incomplete_text,
-                            "session_id": current_session[participant],
-                            "is_session_end": True,  # Mark as session end
-                            "question_id": current_session_metadata.get("question_id"),
-                            "session_status": current_session_metadata.get("session_status", "ended")
-                        })
-                        send_log(node, "DEBUG",
-                            f"🔥 Flushed buffer as final segment: '{incomplete_text}'", log_level)
-                    text_buffers[participant] = ""
-                else:
-                    # No buffer to flush, mark last segment as session end
-                    if segment_queues[participant]:
-                        segment_queues[participant][-1]["is_session_end"] = True
+            # Try to activate queue
+            try_activate_queue()
 
-                current_session[participant] = None
+    # ==================== SENDING SIDE: Audio Complete Events ====================
+    # Audio player sends audio_complete when it receives audio (replaces TTS segment_complete)
+    def on_audio_complete(event):
+        """Send the active queue's next segment once the previous one has played."""
+        nonlocal active_queue
+        metadata = event.get("metadata") or EMPTY_METADATA
+        participant = metadata.get("participant")
 
-                # Try to activate queue
-                try_activate_queue()
+        if not participant:
+            send_log(node, "WARNING", f"audio_complete without participant metadata", log_level)
+            return
 
-        # ==================== SENDING SIDE: Audio Complete Events ====================
-        # Audio player sends audio_complete when it receives audio (replaces TTS segment_complete)
-        elif event_id == "audio_complete":
-            metadata = event.get("metadata", {})
-            participant = metadata.get("participant")
+        is_sending[participant] = False
 
-            if not participant:
-                send_log(node, "WARNING", f"audio_complete without participant metadata", log_level)
-                continue
+        send_log(node, "DEBUG", f"✅ AUDIO_COMPLETE from {participant}", log_level)
 
-            is_sending[participant] = False
+        # FIX: Check if this audio complete is for the last chunk of a session that needs activation
+        if last_session_end_sent[participant] and active_queue == participant:
+            # This is the audio complete for the last chunk of active session - time to activate next!
+            send_log(node, "INFO",
+                f"🏁 AUDIO COMPLETE for LAST CHUNK: {participant}, activating next session",
+                log_level)
 
-            send_log(node, "DEBUG", f"✅ AUDIO_COMPLETE from {participant}", log_level)
+            # Complete the session and activate next
+            active_queue_ref = [active_queue]
+            complete_session_and_activate_next(participant, node, participant_names, session_timestamps, segment_queues, active_queue_ref, is_sending, kick_start_sending, log_level)
+            active_queue = active_queue_ref[0]
+            last_session_end_sent[participant] = False
+            return  # Skip the normal TTS complete processing
 
-            # FIX: Check if this audio complete is for the last chunk of a session that needs activation
-            if last_session_end_sent[participant] and active_queue == participant:
-                # This is the audio complete for the last chunk of active session - time to activate next!
-                send_log(node, "INFO",
-                    f"🏁 AUDIO COMPLETE for LAST CHUNK: {participant}, activating next session",
-                    log_level)
+        # Only process if this participant's queue is active
+        if active_queue != participant:
+            send_log(node, "DEBUG",
+                f"AUDIO_COMPLETE from {participant} but active_queue={active_queue}, ignoring",
+                log_level)
+            return
 
-                # Complete the session and activate next
-                active_queue_ref = [active_queue]
-                complete_session_and_activate_next(participant, node, participant_names, session_timestamps, segment_queues, active_queue_ref, is_sending, kick_start_sending, log_level)
-                active_queue = active_queue_ref[0]
-                last_session_end_sent[participant] = False
-                continue  # Skip the normal TTS complete processing
+        # Check buffer control state BEFORE sending next segment
+        if buffer_control_paused:
+            send_log(node, "INFO",
+                    f"🎵 ⏸️ BUFFER PAUSED: Not sending next segment for {participant} "
+                    f"(buffer: {audio_buffer_level:.1f}%, buffer_control_paused=True)", log_level)
+            return  # Skip sending, wait for buffer recovery
 
-            # Only process if this participant's queue is active
-            if active_queue != participant:
-                send_log(node, "DEBUG",
-                    f"AUDIO_COMPLETE from {participant} but active_queue={active_queue}, ignoring",
-                    log_level)
-                continue
+        # Active queue - continue draining
+        if not segment_queues[participant]:
+            send_log(node, "DEBUG",
+                f"Active queue {participant} is empty, waiting for more chunks", log_level)
+            return
 
-            # Check buffer control state BEFORE sending next segment
-            if buffer_control_paused:
-                send_log(node, "INFO",
-                        f"🎵 ⏸️ BUFFER PAUSED: Not sending next segment for {participant} "
-                        f"(buffer: {audio_buffer_level:.1f}%, buffer_control_paused=True)", log_level)
-                continue  # Skip sending, wait for buffer recovery
+        # Dequeue next segment
+        segment = segment_queues[participant].popleft()
+        output_port = segment_output_port(participant)
 
-            # Active queue - continue draining
-            if not segment_queues[participant]:
-                send_log(node, "DEBUG",
-                    f"Active queue {participant} is empty, waiting for more chunks", log_level)
-                continue
+        send_log(node, "INFO",
+            f"🎤 SENDING to {participant}: '{segment['text']}' "
+            f"(session_id={segment['session_id']}, is_end={segment['is_session_end']}, "
+            f"queue_remaining={len(segment_queues[participant])})",
+            log_level)
 
-            # Dequeue next segment
-            segment = segment_queues[participant].popleft()
-            output_port = f"text_segment_{participant}"
+        node.send_output(
+            output_port,
+            pa.array([segment["text"]]),
+            metadata={
+                "session_id": segment["session_id"],
+                "question_id": segment.get("question_id"),
+                "session_status": segment.get("session_status", "unknown")
+            }
+        )
+        is_sending[participant] = True
 
+        # Check if this was the last segment of a session
+        if segment["is_session_end"]:
+            # Mark that the last chunk of this session has been sent
+            last_session_end_sent[participant] = True
             send_log(node, "INFO",
-                f"🎤 SENDING to {participant}: '{segment['text']}' "
-                f"(session_id={segment['session_id']}, is_end={segment['is_session_end']}, "
-                f"queue_remaining={len(segment_queues[participant])})",
+                f"📤 LAST CHUNK SENT: {participant}, waiting for TTS complete to activate next session",
+                log_level)
+        else:
+            # Not last chunk - continue draining queue normally
+            send_log(node, "DEBUG",
+                f"🔄 CONTINUING DRAIN: {participant}, more segments remaining",
                 log_level)
 
-            node.send_output(
-                output_port,
-                pa.array([segment["text"]]),
-                metadata={
-                    "session_id": segment["session_id"],
-                    "question_id": segment.get("question_id"),
-                    "session_status": segment.get("session_status", "unknown")
-                }
-            )
-            is_sending[participant] = True
-
-            # Check if this was the last segment of a session
-            if segment["is_session_end"]:
-                # Mark that the last chunk of this session has been sent
-                last_session_end_sent[participant] = True
-                send_log(node, "INFO",
-                    f"📤 LAST CHUNK SENT: {participant}, waiting for TTS complete to activate next session",
-                    log_level)
+    # ==================== AUDIO BUFFER CONTROL EVENTS ====================
+    def on_audio_buffer_control(event):
+        """Pause or resume sending based on the audio player's buffer level."""
+        nonlocal active_queue, buffer_control_paused, audio_buffer_level
+        # Handle buffer status from audio player
+        buffer_percentage = None
+
+        # Try to get buffer percentage from event value (primary method)
+        raw_value = event.get("value")
+        if raw_value and len(raw_value) > 0:
+            try:
+                buffer_data = as_py(raw_value[0])
+                if isinstance(buffer_data, (int, float)):
+                    buffer_percentage = float(buffer_data)
+                    send_log(node, "DEBUG", f"🎵 Buffer percentage from event value: {buffer_percentage:.1f}%", log_level)
+            except Exception as e:
+                send_log(node, "DEBUG", f"🎵 Failed to parse buffer percentage from event value: {e}", log_level)
+
+        # Fallback: try to get from metadata (legacy method)
+        if buffer_percentage is None and event.get("metadata") and "buffer_percentage" in event["metadata"].parameters:
+            buffer_percentage = float(as_py(event["metadata"].parameters["buffer_percentage"]))
+            send_log(node, "DEBUG", f"🎵 Buffer percentage from metadata: {buffer_percentage:.1f}%", log_level)
+
+        if buffer_percentage is not None:
+            active_queue_ref = [active_queue]
+            buffer_control_paused_ref = [buffer_control_paused]
+            audio_buffer_level_ref = [audio_buffer_level]
+            last_session_end_sent_ref = [last_session_end_sent]
+            handle_audio_buffer_control(buffer_percentage, node, log_level, active_queue_ref, segment_queues, is_sending, buffer_control_paused_ref, audio_buffer_level_ref, AUDIO_BUFFER_LOW_WATER_MARK, AUDIO_BUFFER_HIGH_WATER_MARK, last_session_end_sent)
+            active_queue = active_queue_ref[0]
+            buffer_control_paused = buffer_control_paused_ref[0]
+            audio_buffer_level = audio_buffer_level_ref[0]
+        else:
+            send_log(node, "WARNING", f"🎵 Received audio_buffer_control event but could not parse buffer percentage", log_level)
+
+    # ==================== CONTROL EVENTS ====================
+    def on_control(event):
+        """Reset/cancel: clear queued segments, optionally keeping the current question."""
+        nonlocal active_queue, buffer_control_paused, audio_buffer_level
+        command = event["value"][0].as_py() if event.get("value") else None
+        metadata = event.get("metadata") or EMPTY_METADATA
+
+        if command in RESET_COMMANDS:
+            incoming_question_id = metadata.get("question_id", None)
+
+            if incoming_question_id is None:
+                # No question_id - clear all (backward compatibility)
+                send_log(node, "INFO", f"🔄 {command.upper()} - Clearing all queues (no question_id)", log_level)
+
+                for participant in participant_names:
+                    segment_queues[participant].clear()
+                    text_buffers[participant] = TextBuffer()
+                    session_timestamps[participant].clear()
+                    current_session[participant] = None
+                    is_sending[participant] = False
+                    last_session_end_sent[participant] = False
+
+                active_queue = None
+                buffer_control_paused = False
+                audio_buffer_level = 0.0
             else:
-                # Not last chunk - continue draining queue normally
-                send_log(node, "DEBUG",
-                    f"🔄 CONTINUING DRAIN: {participant}, more segments remaining",
+                # Smart reset - only clear segments with DIFFERENT question_id
+                send_log(node, "INFO",
+                    f"🔄 {command.upper()} - Smart reset with question_id={incoming_question_id}",
                     log_level)
 
-        # ==================== AUDIO BUFFER CONTROL EVENTS ====================
-        elif event_id == "audio_buffer_control":
-            # Handle buffer status from audio player
-            buffer_percentage = None
-
-            # Try to get buffer percentage from event value (primary method)
-            raw_value = event.get("value")
-            if raw_value and len(raw_value) > 0:
-                try:
-                    buffer_data = raw_value[0].as_py() if hasattr(raw_value[0], 'as_py') else raw_value[0]
-                    if isinstance(buffer_data, (int, float)):
-                        buffer_percentage = float(buffer_data)
-                        send_log(node, "DEBUG", f"🎵 Buffer percentage from event value: {buffer_percentage:.1f}%", log_level)
-                except Exception as e:
-                    send_log(node, "DEBUG", f"🎵 Failed to parse buffer percentage from event value: {e}", log_level)
-
-            # Fallback: try to get from metadata (legacy method)
-            if buffer_percentage is None and event.get("metadata") and "buffer_percentage" in event["metadata"].parameters:
-                buffer_param = event["metadata"].parameters["buffer_percentage"]
-                if hasattr(buffer_param, "as_py"):
-                    buffer_percentage = buffer_param.as_py()
-                else:
-                    buffer_percentage = float(buffer_param)
-                send_log(node, "DEBUG", f"🎵 Buffer percentage from metadata: {buffer_percentage:.1f}%", log_level)
-
-            if buffer_percentage is not None:
-                active_queue_ref = [active_queue]
-                buffer_control_paused_ref = [buffer_control_paused]
-                audio_buffer_level_ref = [audio_buffer_level]
-                last_session_end_sent_ref = [last_session_end_sent]
-                handle_audio_buffer_control(buffer_percentage, node, log_level, active_queue_ref, segment_queues, is_sending, buffer_control_paused_ref, audio_buffer_level_ref, AUDIO_BUFFER_LOW_WATER_MARK, AUDIO_BUFFER_HIGH_WATER_MARK, last_session_end_sent)
-                active_queue = active_queue_ref[0]
-                buffer_control_paused = buffer_control_paused_ref[0]
-                audio_buffer_level = audio_buffer_level_ref[0]
-            else:
-                send_log(node, "WARNING", f"🎵 Received audio_buffer_control event but could not parse buffer percentage", log_level)
+                total_cleared = 0
+                total_kept = 0
 
-        # ==================== CONTROL EVENTS ====================
-        elif event_id in ["control", "reset"]:
-            command = event["value"][0].as_py() if event.get("value") else None
-            metadata = event.get("metadata", {})
+                for participant in participant_names:
+                    original_count = len(segment_queues[participant])
+                    new_queue = deque()
+                    cleared_count = 0
 
-            if command in ["reset", "cancel"]:
-                incoming_question_id = metadata.get("question_id", None)
+                    # Filter segments by question_id
+                    for segment in segment_queues[participant]:
+                        seg_question_id = segment.get("question_id", None)
 
-                if incoming_question_id is None:
-                    # No question_id - clear all (backward compatibility)
-                    send_log(node, "INFO", f"🔄 {command.upper()} - Clearing all queues (no question_id)", log_level)
+                        # Keep if same question_id OR no question_id
+                        if seg_question_id == incoming_question_id or seg_question_id is None:
+                            new_queue.append(segment)
+                        else:
+                            cleared_count += 1
 
-                    for participant in participant_names:
-                        segment_queues[participant].clear()
-                        text_buffers[participant] = ""
-                        session_timestamps[participant].clear()
-                        current_session[participant] = None
-                        is_sending[participant] = False
-                        last_session_end_sent[participant] = False
+                    segment_queues[participant] = new_queue
+                    total_cleared += cleared_count
+                    total_kept += len(new_queue)
 
-                    active_queue = None
-                    buffer_control_paused = False
-                    audio_buffer_level = 0.0
-                else:
-                    # Smart reset - only clear segments with DIFFERENT question_id
-                    send_log(node, "INFO",
-                        f"🔄 {command.upper()} - Smart reset with question_id={incoming_question_id}",
-                        log_level)
-
-                    total_cleared = 0
-                    total_kept = 0
-
-                    for participant in participant_names:
-                        original_count = len(segment_queues[participant])
-                        new_queue = deque()
-                        cleared_count = 0
-
-                        # Filter segments by question_id
-                        for segment in segment_queues[participant]:
-                            seg_question_id = segment.get("question_id", None)
-
-                            # Keep if same question_id OR no question_id
-                            if seg_question_id == incoming_question_id or seg_question_id is None:
-                                new_queue.append(segment)
-                            else:
-                                cleared_count += 1
+                    # Clear text buffer for participants with old data
+                    if cleared_count > 0:
+                        text_buffers[participant] = TextBuffer()
+                        is_sending[participant] = False
 
-                        segment_queues[participant] = new_queue
-                        total_cleared += cleared_count
-                        total_kept += len(new_queue)
+                    # Log per-participant stats
+                    if cleared_count > 0 or len(new_queue) > 0:
+                        send_log(node, "DEBUG",
+                            f"  {participant}: cleared {cleared_count}/{original_count}, kept {len(new_queue)}",
+                            log_level)
 
-                        # Clear text buffer for participants with old data
-                        if cleared_count > 0:
-                            text_buffers[participant] = ""
-                            is_sending[participant] = False
+                send_log(node, "INFO",
+                    f"Smart reset complete: cleared {total_cleared} old segments, kept {total_kept} from question_id={incoming_question_id}",
+                    log_level)
 
-                        # Log per-participant stats
-                        if cleared_count > 0 or len(new_queue) > 0:
-                            send_log(node, "DEBUG",
-                                f"  {participant}: cleared {cleared_count}/{original_count}, kept {len(new_queue)}",
-                                log_level)
+                # Reset buffer control state and active queue
+                active_queue = None
+                buffer_control_paused = False
+                audio_buffer_level = 0.0
+
+    # Fixed ports are dispatched by a single dict lookup; participant ports are
+    # discovered at runtime and registered on their first event
+    event_handlers = {
+        "audio_complete": on_audio_complete,
+        "audio_buffer_control": on_audio_buffer_control,
+        **{port: on_control for port in CONTROL_PORTS},
+    }
 
-                    send_log(node, "INFO",
-                        f"Smart reset complete: cleared {total_cleared} old segments, kept {total_kept} from question_id={incoming_question_id}",
-                        log_level)
+    send_log(node, "INFO", "Multi-Participant Text Segmenter started (session-based FIFO)", log_level)
 
-                    # Reset buffer control state and active queue
-                    active_queue = None
-                    buffer_control_paused = False
-                    audio_buffer_level = 0.0
+    for event in node:
+        event_id = event["id"]
+        handler = event_handlers.get(event_id)
+        if handler is None:
+            if not is_participant_port(event_id):
+                continue  # e.g. legacy tts_complete_* ports
+            handler = event_handlers[event_id] = on_participant_input
+        handler(event)
 
 
 if __name__ == "__main__":
@@ -16,16 +16,95 @@ import os
 import time
 import re
 import json
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Iterable, List, Tuple
 import pyarrow as pa
 from dora import Node
 from collections import deque
 
+# Pattern: [any text] ONLY at the beginning of the string
+# Examples: [Student1], [Tutor], [孙老师], [亦菲], etc.
+# ^: match at start of string
+# \[: literal opening bracket
+# [^\]]+: one or more non-bracket characters
+# \]: literal closing bracket
+# \s*: optional whitespace after bracket
+SPEAKER_ID_PATTERN = re.compile(r'^\[[^\]]+\]\s*')
+
+# Empty text payload carrying the session_ended signal
+EMPTY_SEGMENT = pa.array([""])
+
+# Read-only fallback for metadata-less events. The text handler still takes
+# a fresh dict: its metadata is queued and marked "ended" later
+EMPTY_METADATA = MappingProxyType({})
+
+
+@lru_cache(maxsize=8)
+def punctuation_patterns(punctuation_marks: str):
+    """Compiled (segment, open text, mark) patterns for the configured punctuation marks.
+
+    segment matches a run of non-punctuation text closed by one mark;
+    open text matches a single non-punctuation character;
+    mark matches a single punctuation mark.
+    """
+    if not punctuation_marks:
+        return re.compile(r'(?!)'), re.compile(r'[\s\S]'), re.compile(r'(?!)')
+    marks = re.escape(punctuation_marks)
+    return re.compile(f'[^{marks}]+[{marks}]'), re.compile(f'[^{marks}]'), re.compile(f'[{marks}]')
+
+
+@lru_cache(maxsize=8)
+def skip_pattern(punctuation_marks: str):
+    """Compiled "only whitespace, digits and punctuation" pattern for should_skip_segment."""
+    return re.compile(f'^[\\s\\d{re.escape(punctuation_marks)}]+$')
+
+
+@lru_cache(maxsize=8)
+def open_run_pattern(punctuation_marks: str):
+    """Compiled pattern for text that can neither close a segment nor be discarded.
+
+    Full match means: no punctuation, no trailing whitespace, and at least one
+    character that is not whitespace or a digit.
+    """
+    marks = re.escape(punctuation_marks)
+    return re.compile(f'(?=.*[^\\s\\d])[^{marks}]*[^{marks}\\s]', re.DOTALL)
+
+
+class TextBuffer:
+    """Incomplete text carried between LLM chunks, kept as a list of parts.
+
+    Appending to a str copies everything buffered so far, which is quadratic
+    when the LLM streams a long sentence a few characters at a time. Parts are
+    joined only when the buffer is read, and the buffer always holds the same
+    text that `(buffer + chunk).strip()` would.
+    """
+
+    def __init__(self, text=""):
+        self._parts = [text] if text else []
+        self._length = len(text)
+
+    def __len__(self):
+        return self._length
+
+    def __str__(self):
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def extend(self, chunk: str):
+        """Append a chunk, stripping it the way the joined text would be stripped."""
+        piece = chunk.rstrip() if self._parts else chunk.strip()
+        if piece:
+            self._parts.append(piece)
+            self._length += len(piece)
+
+
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
 
 def send_log(node, level, message, config_level="INFO"):
     """Send log message through log output channel."""
-    LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
-
     if LOG_LEVELS.get(level, 0) < LOG_LEVELS.get(config_level, 20):
         return
 
@@ -61,16 +140,7 @@ def remove_speaker_id(text, node=None, log_level="INFO"):
     Returns:
         Text with speaker IDs removed
     """
-    # Pattern: [any text] ONLY at the beginning of the string
-    # Examples: [Student1], [Tutor], [孙老师], [亦菲], etc.
-    # ^: match at start of string
-    # \[: literal opening bracket
-    # [^\]]+: one or more non-bracket characters
-    # \]: literal closing bracket
-    # \s*: optional whitespace after bracket
-    pattern = r'^\[[^\]]+\]\s*'
-
-    cleaned_text = re.sub(pattern, '', text)
+    cleaned_text = SPEAKER_ID_PATTERN.sub('', text)
 
     if node and cleaned_text != text:
         send_log(node, "DEBUG", f"Removed speaker ID: '{text}' → '{cleaned_text}'", log_level)
@@ -96,15 +166,9 @@ def should_skip_segment(text, punctuation_marks="。！？.!?", node=None, log_l
             send_log(node, "DEBUG", f"Filter: SKIP empty: '{text}' (len={len(text)})", log_level)
         return True
 
-    # Build pattern dynamically from configured punctuation marks
-    # Escape special regex characters in punctuation marks
-    escaped_punctuation = re.escape(punctuation_marks)
-
     # Pattern: only whitespace + numbers + configured punctuation marks
-    # This allows filtering based on user-configured punctuation
-    skip_pattern = f'^[\\s\\d{escaped_punctuation}]+$'
-
-    matched = re.match(skip_pattern, text_stripped)
+    # (compiled once per punctuation configuration)
+    matched = skip_pattern(punctuation_marks).match(text_stripped)
     if matched:
         if node:
             send_log(node, "DEBUG", f"Filter: SKIP punctuation: '{text}' (len={len(text)}, pattern matched)", log_level)
@@ -189,6 +253,55 @@ def split_segment_to_max(
     return chunks, ""
 
 
+def text_event_fields(event):
+    """(text, session_status, question_id) for a text INPUT event, else None."""
+    if event["type"] != "INPUT" or event["id"] != "text":
+        return None
+    metadata = event.get("metadata") or EMPTY_METADATA
+    return event["value"][0].as_py(), metadata.get("session_status", ""), metadata.get("question_id", None)
+
+
+def coalesce_text_events(node, punctuation_marks):
+    """Yield node events, merging text chunks that are already queued.
+
+    While the LLM streams, several chunks are often waiting by the time one
+    has been segmented. A queued chunk is folded into the current one only
+    when segmenting them together gives the same result as one after the
+    other: the current text must be an open run (see open_run_pattern), so
+    it neither closes a segment nor gets discarded as a stray tail, and
+    neither chunk may carry session_status "ended". The merged event keeps
+    the later chunk's metadata, which is what any segment it closes would
+    have been tagged with.
+    """
+    open_run = open_run_pattern(punctuation_marks)
+    pending = None
+    while True:
+        event = pending if pending is not None else node.next()
+        pending = None
+        if event is None:
+            return
+
+        fields = text_event_fields(event)
+        while fields is not None and fields[1] != "ended" and open_run.fullmatch(fields[0]):
+            queued = node.next(timeout=0)
+            if queued is None:
+                break
+            queued_fields = text_event_fields(queued)
+            if (
+                queued_fields is None
+                or queued_fields[1] == "ended"
+                # current_question_id must end up the same as when applied one by one
+                or (queued_fields[2] is None and fields[2] is not None)
+            ):
+                pending = queued
+                break
+            merged_text = fields[0] + queued_fields[0]
+            event = {**queued, "value": pa.array([merged_text])}
+            fields = (merged_text, queued_fields[1], queued_fields[2])
+
+        yield event
+
+
 def segment_by_punctuation(
     text,
     punctuation_marks,
@@ -197,6 +310,7 @@ def segment_by_punctuation(
     fallback_split_marks,
     node=None,
     log_level="INFO",
+    scan_from=0,
 ):
     """Segment text by punctuation marks, respecting MAX_SEGMENT_LENGTH when possible.
 
@@ -205,18 +319,29 @@ def segment_by_punctuation(
     - If a segment is <= MAX_SEGMENT_LENGTH, keep it as-is
     - If a segment is > MAX_SEGMENT_LENGTH, split it at intermediate punctuation marks
     - Never split mid-sentence (always split at punctuation boundaries)
+
+    scan_from is the length of the previously buffered incomplete text at the
+    start of `text`; only the newly appended part is scanned for punctuation.
     """
     if not text:
         return [], "", False
 
-    escaped_punctuation = re.escape(punctuation_marks)
-    pattern = f'[^{escaped_punctuation}]+[{escaped_punctuation}]'
+    segment_pattern, open_text_pattern, _ = punctuation_patterns(punctuation_marks)
 
     segments: List[str] = []
     last_end = 0
     accumulator = ""
 
-    for match in re.finditer(pattern, text):
+    # text[:scan_from] is the buffered tail of the previous call and holds no
+    # closed segment, only optional stray punctuation followed by open text,
+    # so resume matching where that open text starts instead of re-scanning it
+    open_text = open_text_pattern.search(text, 0, scan_from)
+    scan_start = open_text.start() if open_text else scan_from
+
+    # A segment is a run of non-punctuation text closed by one punctuation
+    # mark; punctuation with no text before it is skipped. finditer walks the
+    # matches in C rather than testing every character in Python
+    for match in segment_pattern.finditer(text, scan_start):
         segment_text = match.group().strip()
         if not segment_text:
             continue
@@ -326,7 +451,7 @@ def main():
     current_question_id = None
 
     # Text buffer for incomplete segments (accumulates across LLM chunks)
-    text_buffer = ""
+    text_buffer = TextBuffer()
 
     # Track pending session_ended signal (when it arrives while is_sending=True)
     pending_session_end = False
@@ -334,7 +459,11 @@ def main():
 
     send_log(node, "INFO", "Text Segmenter started with punctuation-based segmentation", log_level)
     
-    for event in node:
+    # Speaker IDs are stripped per chunk, so merging chunks would change what gets removed
+    events = node if remove_speaker_id_enabled else coalesce_text_events(node, punctuation_marks)
+    _, _, punctuation_mark_pattern = punctuation_patterns(punctuation_marks)
+
+    for event in events:
         if event["type"] == "INPUT":
             if event["id"] == "text":
                 # Received text from LLM
@@ -349,13 +478,14 @@ def main():
                     send_log(node, "INFO", f"🏁 SESSION ENDED signal received", log_level)
 
                     # If there's buffered text, flush it with "ended" status
-                    if text_buffer.strip():
-                        send_log(node, "INFO", f"🏁 Flushing buffer on session end: '{text_buffer}'", log_level)
+                    if text_buffer:
+                        buffered_text = str(text_buffer)
+                        send_log(node, "INFO", f"🏁 Flushing buffer on session end: '{buffered_text}'", log_level)
                         segment_queue.append({
-                            "text": text_buffer.strip(),
+                            "text": buffered_text,
                             "metadata": {**metadata, "session_status": "ended"},
                         })
-                        text_buffer = ""
+                        text_buffer = TextBuffer()
 
                     # If queue has items, mark the last one as "ended"
                     if segment_queue:
@@ -397,40 +527,55 @@ def main():
                 if question_id is not None:
                     current_question_id = question_id
 
-                # Combine with buffered text from previous chunk
-                combined_text = text_buffer + text
-
-                if text_buffer:
-                    send_log(node, "DEBUG", f"Combined buffered '{text_buffer}' + new '{text}' = '{combined_text}'", log_level)
-
-                # Segment the combined text by punctuation
-                send_log(node, "INFO", f"🟡 COMBINED TEXT (buffer + new): '{combined_text}' (len={len(combined_text)})", log_level)
-
-                complete_segments, incomplete_text, keep_incomplete = segment_by_punctuation(
-                    combined_text,
-                    punctuation_marks,
-                    max_segment_length,
-                    min_segment_length,
-                    fallback_split_marks,
-                    node,
-                    log_level,
-                )
+                if not punctuation_mark_pattern.search(text):
+                    # No mark in this chunk, so nothing can close: append it to
+                    # the buffer without re-joining and re-scanning the buffered text.
+                    # An empty buffer only starts on text that would not be discarded
+                    if text_buffer or not should_skip_segment(text, punctuation_marks):
+                        text_buffer.extend(text)
+                    send_log(node, "INFO", f"🟡 BUFFERED (no punctuation): '{text}' (buffer len={len(text_buffer)})", log_level)
+                    complete_segments = []
+                else:
+                    # Combine with buffered text from previous chunk
+                    buffered_text = str(text_buffer)
+                    combined_text = buffered_text + text
+
+                    if buffered_text:
+                        send_log(node, "DEBUG", f"Combined buffered '{buffered_text}' + new '{text}' = '{combined_text}'", log_level)
+
+                    # Segment the combined text by punctuation
+                    send_log(node, "INFO", f"🟡 COMBINED TEXT (buffer + new): '{combined_text}' (len={len(combined_text)})", log_level)
+
+                    complete_segments, incomplete_text, keep_incomplete = segment_by_punctuation(
+                        combined_text,
+                        punctuation_marks,
+                        max_segment_length,
+                        min_segment_length,
+                        fallback_split_marks,
+                        node,
+                        log_level,
+                        scan_from=len(buffered_text),
+                    )
 
-                send_log(node, "INFO", f"🟢 SEGMENTATION OUTPUT: {len(complete_segments)} segments, incomplete: '{incomplete_text}' (len={len(incomplete_text)})", log_level)
-                for i, seg in enumerate(complete_segments):
-                    send_log(node, "INFO", f"🟢   Segment {i}: '{seg}' (len={len(seg)})", log_level)
-
-                # Handle standalone punctuation in buffer
-                # If incomplete_text is ONLY punctuation/whitespace, don't buffer it
-                # (This happens when LLM sends standalone punctuation after a complete segment)
-                if incomplete_text:
-                    if not keep_incomplete and should_skip_segment(incomplete_text, punctuation_marks, node, log_level):
-                        send_log(node, "DEBUG", f"Discarding standalone punctuation buffer: '{incomplete_text}'", log_level)
-                        text_buffer = ""
+                    # One log emit per chunk: every send_log is a separate dora output,
+                    # so the per-segment lines are joined instead of sent one by one
+                    segment_lines = "".join(
+                        f"\n🟢   Segment {i}: '{seg}' (len={len(seg)})"
+                        for i, seg in enumerate(complete_segments)
+                    )
+                    send_log(node, "INFO", f"🟢 SEGMENTATION OUTPUT: {len(complete_segments)} segments, incomplete: '{incomplete_text}' (len={len(incomplete_text)}){segment_lines}", log_level)
+
+                    # Handle standalone punctuation in buffer
+                    # If incomplete_text is ONLY punctuation/whitespace, don't buffer it
+                    # (This happens when LLM sends standalone punctuation after a complete segment)
+                    if incomplete_text:
+                        if not keep_incomplete and should_skip_segment(incomplete_text, punctuation_marks, node, log_level):
+                            send_log(node, "DEBUG", f"Discarding standalone punctuation buffer: '{incomplete_text}'", log_level)
+                            text_buffer = TextBuffer()
+                        else:
+                            text_buffer = TextBuffer(incomplete_text)
                     else:
-                        text_buffer = incomplete_text
-                else:
-                    text_buffer = ""
+                        text_buffer = TextBuffer()
 
                 # Queue all complete segments
                 for segment_text in complete_segments:
@@ -493,7 +638,7 @@ def main():
                         # Send empty segment with session_status="ended" to signal completion
                         node.send_output(
                             "text_segment",
-                            pa.array([""]),
+                            EMPTY_SEGMENT,
                             metadata={**pending_session_end_metadata, "session_status": "ended"}
                         )
                         pending_session_end = False
@@ -506,7 +651,7 @@ def main():
                     cleared_segments = len(segment_queue)
                     cleared_buffer = len(text_buffer) > 0
                     segment_queue.clear()
-                    text_buffer = ""
+                    text_buffer = TextBuffer()
                     is_sending = False
                     pending_session_end = False
                     pending_session_end_metadata = {}
@@ -523,7 +668,7 @@ def main():
                     send_log(node, "DEBUG", f"Ignoring 'resume' command on reset input", log_level)
                     continue
 
-                metadata = event.get("metadata", {})
+                metadata = event.get("metadata") or EMPTY_METADATA
                 incoming_question_id = metadata.get("question_id", None)
 
                 if incoming_question_id is None:
@@ -531,7 +676,7 @@ def main():
                     cleared_count = len(segment_queue)
                     cleared_buffer = len(text_buffer) > 0
                     segment_queue.clear()
-                    text_buffer = ""
+                    text_buffer = TextBuffer()
                     is_sending = False
                     pending_session_end = False
                     pending_session_end_metadata = {}
@@ -564,7 +709,7 @@ def main():
                     buffer_was_cleared = False
                     if current_question_id != incoming_question_id:
                         buffer_was_cleared = len(text_buffer) > 0
-                        text_buffer = ""
+                        text_buffer = TextBuffer()
                         # Also clear pending session_ended from old question
                         pending_session_end = False
                         pending_session_end_metadata = {}
@@ -9,11 +9,14 @@ import json
 import pyarrow as pa
 from dora import Node
 
+# Prebuilt status payload sent after every forwarded segment
+SEGMENT_SENT = pa.array(["segment_sent"])
+
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
 
 def send_log(node, level, message, config_level="INFO"):
     """Send log message through log output channel."""
-    LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
-
     if LOG_LEVELS.get(level, 0) < LOG_LEVELS.get(config_level, 20):
         return
 
@@ -39,7 +42,8 @@ def main():
     for event in node:
         if event["type"] == "INPUT":
             if event["id"] == "text":
-                text = event["value"][0].as_py()
+                value = event["value"]
+                text = value[0].as_py()
                 metadata = event.get("metadata", {})
 
                 send_log(node, "DEBUG", f"Received text: {len(text)} chars", log_level)
@@ -51,9 +55,11 @@ def main():
                     "original_metadata": metadata
                 }
 
+                # Forward the received Arrow array as-is instead of re-encoding the text;
+                # only slice when the input carries more than the one segment we send
                 node.send_output(
                     "text_segment",
-                    pa.array([text]),
+                    value if len(value) == 1 else value.slice(0, 1),
                     metadata=out_metadata
                 )
 
@@ -63,7 +69,7 @@ def main():
                 # Also send completion signal
                 node.send_output(
                     "status",
-                    pa.array(["segment_sent"]),
+                    SEGMENT_SENT,
                     metadata={"segment_index": segment_index - 1}
                 )
 
@@ -0,0 +1,211 @@
+"""Tests for the streaming text segmenters, run against a stub dora node."""
+
+import random
+
+import pyarrow as pa
+import pytest
+
+from dora_text_segmenter import multi_participant_segmenter, queue_based_segmenter
+
+PUNCTUATION_MARKS = "。！？.!?，,、；：（）【】《》"
+
+
+class StubNode:
+    """Replays a fixed list of events and records non-log outputs."""
+
+    def __init__(self, events):
+        self.events = list(events)
+        self.outputs = []
+
+    def next(self, timeout=None):
+        return self.events.pop(0) if self.events else None
+
+    def __iter__(self):
+        while self.events:
+            yield self.events.pop(0)
+
+    def send_output(self, output_id, data, metadata=None):
+        if output_id != "log":
+            self.outputs.append((output_id, data.to_pylist(), dict(metadata or {})))
+
+
+def text_event(text, **metadata):
+    return {"type": "INPUT", "id": "text", "value": pa.array([text]), "metadata": metadata}
+
+
+def input_event(event_id, value=""):
+    return {"type": "INPUT", "id": event_id, "value": pa.array([value]), "metadata": {}}
+
+
+def coalesced(events):
+    """(id, text or None, metadata) for each event coalesce_text_events yields."""
+    node = StubNode(events)
+    return [
+        (
+            event["id"],
+            event["value"][0].as_py() if event["id"] == "text" else None,
+            event["metadata"],
+        )
+        for event in queue_based_segmenter.coalesce_text_events(node, PUNCTUATION_MARKS)
+    ]
+
+
+def run_queue_based(monkeypatch, events):
+    """Run the single-mode main loop over events and return its outputs."""
+    node = StubNode(events)
+    monkeypatch.setattr(queue_based_segmenter, "Node", lambda *args, **kwargs: node)
+    queue_based_segmenter.main()
+    return node.outputs
+
+
+def test_coalesce_merges_queued_open_runs():
+    events = coalesced([
+        text_event("Hel", question_id=1),
+        text_event("lo", question_id=1),
+        text_event(" world.", question_id=1, k="last"),
+        input_event("tts_complete"),
+        text_event("Next", question_id=1),
+    ])
+
+    # Merging stops after the chunk that closes a segment; the merged
+    # event carries the metadata of the last chunk folded into it
+    assert events == [
+        ("text", "Hello world.", {"question_id": 1, "k": "last"}),
+        ("tts_complete", None, {}),
+        ("text", "Next", {"question_id": 1}),
+    ]
+
+
+def test_coalesce_does_not_merge_trailing_whitespace_or_digits():
+    assert [text for _, text, _ in coalesced([text_event("Hello "), text_event("world")])] == ["Hello ", "world"]
+    assert [text for _, text, _ in coalesced([text_event("42"), text_event("apples")])] == ["42", "apples"]
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ({"question_id": 1}, {"question_id": 1, "session_status": "ended"}),
+        ({"question_id": 1, "session_status": "ended"}, {"question_id": 1}),
+    ],
+)
+def test_coalesce_never_merges_ended_chunks(first, second):
+    events = coalesced([text_event("Hel", **first), text_event("lo", **second)])
+
+    assert events == [("text", "Hel", first), ("text", "lo", second)]
+
+
+def test_coalesce_keeps_question_id_when_queued_chunk_has_none():
+    # Merging would drop question_id 1 before current_question_id is updated
+    events = coalesced([text_event("Hel", question_id=1), text_event("lo")])
+    assert [text for _, text, _ in events] == ["Hel", "lo"]
+
+    # A chunk without question_id can still take on a later one
+    events = coalesced([text_event("Hel"), text_event("lo", question_id=1)])
+    assert events == [("text", "Hello", {"question_id": 1})]
+
+
+def test_coalescing_does_not_change_segments(monkeypatch):
+    def stream():
+        return [
+            text_event("你好", question_id=1),
+            text_event("世界", question_id=1),
+            text_event("！今天", question_id=1),
+            text_event("天气很好。", question_id=1),
+            input_event("tts_complete"),
+            text_event("42", question_id=1),
+            text_event("It is", question_id=1),
+            text_event(" sunny", question_id=1),
+            text_event(" today.", question_id=1),
+            input_event("tts_complete"),
+            text_event("", question_id=1, session_status="ended"),
+            input_event("tts_complete"),
+            input_event("tts_complete"),
+        ]
+
+    merged = run_queue_based(monkeypatch, stream())
+    monkeypatch.setattr(queue_based_segmenter, "coalesce_text_events", lambda node, marks: node)
+    one_by_one = run_queue_based(monkeypatch, stream())
+
+    assert merged == one_by_one
+    assert [data for output_id, data, _ in merged if output_id == "text_segment"] == [
+        ["你好世界！"],
+        ["今天天气很好。"],
+        ["It is sunny today."],
+        [""],
+    ]
+
+
+def test_speaker_id_removal_disables_coalescing(monkeypatch):
+    def fail(node, marks):
+        raise AssertionError("coalesce_text_events must not run when REMOVE_SPEAKER_ID is on")
+
+    monkeypatch.setenv("REMOVE_SPEAKER_ID", "true")
+    monkeypatch.setattr(queue_based_segmenter, "coalesce_text_events", fail)
+
+    outputs = run_queue_based(monkeypatch, [
+        text_event("[Tutor] Hello", question_id=1),
+        text_event("[Student] world.", question_id=1),
+    ])
+
+    # Each chunk loses its own prefix, which merged chunks would not
+    assert [data for output_id, data, _ in outputs if output_id == "text_segment"] == [["Helloworld."]]
+
+
+@pytest.mark.parametrize("module", [queue_based_segmenter, multi_participant_segmenter])
+def test_text_buffer_matches_stripped_concatenation(module):
+    rng = random.Random(0)
+    alphabet = ["你", "好", "a", "b", "4", " ", "  ", "\n", "\t"]
+    for _ in range(500):
+        buffer = module.TextBuffer()
+        expected = ""
+        for _ in range(rng.randint(1, 8)):
+            chunk = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 4)))
+            buffer.extend(chunk)
+            expected = (expected + chunk).strip()
+            assert str(buffer) == expected
+            assert len(buffer) == len(expected)
+            assert bool(buffer) == bool(expected)
+
+
+@pytest.mark.parametrize("first_chunk", ["42", "   ", "\n"])
+def test_single_mode_discards_skippable_first_chunk(monkeypatch, first_chunk):
+    outputs = run_queue_based(monkeypatch, [
+        text_event(first_chunk, question_id=1),
+        text_event("Hi there.", question_id=1),
+    ])
+
+    assert [data for output_id, data, _ in outputs if output_id == "text_segment"] == [["Hi there."]]
+
+
+def test_single_mode_keeps_digits_after_open_text(monkeypatch):
+    # Feed the chunks one by one so each goes through the no-punctuation path
+    monkeypatch.setattr(queue_based_segmenter, "coalesce_text_events", lambda node, marks: node)
+    outputs = run_queue_based(monkeypatch, [
+        text_event("Room", question_id=1),
+        text_event(" 42", question_id=1),
+        text_event(" please.", question_id=1),
+    ])
+
+    assert [data for output_id, data, _ in outputs if output_id == "text_segment"] == [["Room 42 please."]]
+
+
+@pytest.mark.parametrize("module", [queue_based_segmenter, multi_participant_segmenter])
+def test_scan_from_matches_full_rescan(module):
+    node = StubNode([])
+    if module is queue_based_segmenter:
+        def segment(text, max_length, **kwargs):
+            return module.segment_by_punctuation(text, PUNCTUATION_MARKS, max_length, 5, set(), **kwargs)
+    else:
+        def segment(text, max_length, **kwargs):
+            return module.segment_by_punctuation(text, 5, max_length, PUNCTUATION_MARKS, node, "INFO", **kwargs)
+
+    rng = random.Random(1)
+    alphabet = list("你好世界ab c 4") + list("。！？.!?，,") + [" ", "\n"]
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        cut = rng.randint(0, len(text))
+        max_length = rng.choice([0, 5, 15, 100])
+        # The buffer is always the incomplete tail left by the previous call
+        buffer = segment(text[:cut], max_length)[1]
+        combined = buffer + text[cut:]
+        assert segment(combined, max_length, scan_from=len(buffer)) == segment(combined, max_length)